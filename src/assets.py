@@ -0,0 +1,122 @@
+import os
+
+from utils import file_hash, remove_output
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+ASSET_METHODS = ["copy", "hardlink", "reflink"]
+
+
+def walk_files(folder, relative="") -> list:
+    files = []
+    with os.scandir(os.path.join(folder, relative)) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            item = os.path.join(relative, entry.name)
+            if entry.is_dir():
+                files.extend(walk_files(folder, item))
+            else:
+                files.append(item)
+    return files
+
+
+def is_unchanged(source, dest, checksum=False) -> bool:
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source)
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+    if os.path.samestat(source_stat, dest_stat):
+        return True
+    if checksum:
+        return file_hash(source) == file_hash(dest)
+    return source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def copy_file(source, dest, method="copy") -> str:
+    # Always replace dest instead of writing into it: it may be a hardlink
+    # to an older version of the source
+    if os.path.lexists(dest):
+        os.remove(dest)
+    if method == "hardlink":
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    import shutil
+
+    with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+        used = copy_file_contents(fsrc, fdst, method == "reflink")
+    shutil.copymode(source, dest)
+    stat = os.stat(source)
+    os.utime(dest, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return used
+
+
+def copy_file_contents(fsrc, fdst, reflink=False) -> str:
+    if reflink and fcntl is not None:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return "reflink"
+        except OSError:
+            pass
+    if hasattr(os, "copy_file_range"):
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = 0
+        try:
+            while copied < size:
+                count = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                if count == 0:
+                    break
+                copied += count
+        except OSError:
+            pass
+        if copied == size:
+            return "copy_file_range"
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+    import shutil
+
+    shutil.copyfileobj(fsrc, fdst)
+    return "copy"
+
+
+def sync_static(
+    static_path,
+    docs_path,
+    previous=None,
+    method="copy",
+    checksum=False,
+    pages=(),
+) -> tuple:
+    assets = {}
+    copied = []
+    if not os.path.exists(static_path):
+        print("Folder to copy doesn't exist")
+        files = []
+    else:
+        files = walk_files(static_path)
+    # A page replaces a static file rendered to the same path, as in plan_tasks
+    pages = {os.path.normpath(dest) for dest in pages}
+    for relative in files:
+        if os.path.normpath(relative) in pages:
+            continue
+        source = os.path.join(static_path, relative)
+        dest = os.path.join(docs_path, relative)
+        if not is_unchanged(source, dest, checksum):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            copy_file(source, dest, method)
+            copied.append(relative)
+        stat = os.stat(source)
+        assets[relative] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    for relative in previous or {}:
+        if relative not in assets and os.path.normpath(relative) not in pages:
+            remove_output(docs_path, relative)
+    return assets, copied
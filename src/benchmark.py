@@ -0,0 +1,231 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+from blocks import BlockType, block_to_block_type, markdown_to_blocks, scan_blocks
+from utils import (
+    block_cache_stats,
+    generate_pages_recursive,
+    markdown_to_html_node,
+    render_block,
+    text_to_textnodes,
+)
+
+CORPUS_KINDS = ["inline", "lists", "code", "mixed", "boilerplate"]
+STAGES = [
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "markdown_to_html_node",
+    "to_html",
+    "generate_pages_recursive",
+]
+WORDS = "the ring of power was forged in mount doom by sauron long ago".split()
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def sentence(rng, inline) -> str:
+    words = []
+    for i in range(rng.randint(6, 14)):
+        word = rng.choice(WORDS)
+        if inline:
+            match (rng.randrange(6)):
+                case 0:
+                    word = f"**{word}**"
+                case 1:
+                    word = f"_{word}_"
+                case 2:
+                    word = f"`{word}`"
+                case 3:
+                    word = f"[{word}](/blog/{word}-{i})"
+        words.append(word)
+    return " ".join(words)
+
+
+def paragraph(rng, inline) -> str:
+    return "\n".join(sentence(rng, inline) for _ in range(rng.randint(1, 4)))
+
+
+def boilerplate_blocks() -> list:
+    rng = random.Random("boilerplate")
+    return [
+        "\n".join(f"- {sentence(rng, True)}" for _ in range(5)),
+        f"> {sentence(rng, True)}\n>\n> {sentence(rng, False)}",
+        "```\n" + "\n".join(f"    {rng.choice(WORDS)}()" for _ in range(8)) + "\n```",
+        paragraph(rng, True),
+        paragraph(rng, True),
+    ]
+
+
+def generate_document(kind, rng) -> str:
+    blocks = [f"# {sentence(rng, False)}"]
+    if kind == "boilerplate":
+        shared = boilerplate_blocks()
+        blocks.append(shared[0])
+    for i in range(rng.randint(8, 16)):
+        section = kind if kind in CORPUS_KINDS[:3] else CORPUS_KINDS[i % 3]
+        match (section):
+            case "inline":
+                blocks.append(paragraph(rng, True))
+            case "lists":
+                items = [sentence(rng, True) for _ in range(rng.randint(3, 12))]
+                if i % 2 == 0:
+                    blocks.append("\n".join(f"- {item}" for item in items))
+                else:
+                    blocks.append(
+                        "\n".join(f"{n + 1}. {item}" for n, item in enumerate(items))
+                    )
+            case "code":
+                lines = [
+                    f"    {rng.choice(WORDS)}({rng.choice(WORDS)}, {n})"
+                    for n in range(rng.randint(4, 30))
+                ]
+                blocks.append("```\n" + "\n".join(lines) + "\n```")
+                blocks.append(paragraph(rng, False))
+        if i % 5 == 4:
+            blocks.append(f"## {sentence(rng, False)}")
+            blocks.append(f"> {sentence(rng, True)}\n>\n> {sentence(rng, False)}")
+        if kind == "boilerplate" and i % 2 == 1:
+            blocks.append(rng.choice(shared[1:]))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(kind, pages, seed=0) -> list:
+    rng = random.Random(f"{kind}-{seed}")
+    return [generate_document(kind, rng) for _ in range(pages)]
+
+
+def write_corpus(documents, content_dir, pages_per_dir=100) -> None:
+    for i, document in enumerate(documents):
+        directory = os.path.join(content_dir, f"section{i // pages_per_dir}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"page{i}.md"), "w") as f:
+            f.write(document)
+
+
+def best_time(function, repeat) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_generate_pages(documents) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        docs = os.path.join(tmp, "docs")
+        template = os.path.join(tmp, "template.html")
+        write_corpus(documents, content)
+        with open(template, "w") as f:
+            f.write(TEMPLATE)
+        os.mkdir(docs)
+        render_block.cache_clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, docs, "/")
+        elapsed = time.perf_counter() - start
+        shutil.rmtree(docs)
+    return elapsed
+
+
+def benchmark_corpus(documents, repeat=3, stages=STAGES) -> dict:
+    blocks = [block for document in documents for block in markdown_to_blocks(document)]
+    inline = [
+        " ".join(lines)
+        for document in documents
+        for block_type, lines in scan_blocks(document)
+        if block_type is not BlockType.CODE
+    ]
+    trees = [markdown_to_html_node(document) for document in documents]
+
+    def render_cold():
+        render_block.cache_clear()
+        return [markdown_to_html_node(document) for document in documents]
+
+    runs = {
+        "markdown_to_blocks": lambda: [markdown_to_blocks(d) for d in documents],
+        "block_to_block_type": lambda: [block_to_block_type(b) for b in blocks],
+        "text_to_textnodes": lambda: [text_to_textnodes(text) for text in inline],
+        "markdown_to_html_node": render_cold,
+        "to_html": lambda: [tree.to_html() for tree in trees],
+    }
+    results = {}
+    for stage in stages:
+        if stage == "generate_pages_recursive":
+            results[stage] = min(time_generate_pages(documents) for _ in range(repeat))
+        else:
+            results[stage] = best_time(runs[stage], repeat)
+    return results
+
+
+def block_hit_rate(documents) -> float:
+    render_block.cache_clear()
+    for document in documents:
+        markdown_to_html_node(document)
+    return block_cache_stats()["hit_rate"]
+
+
+def run_benchmarks(sizes, kinds, repeat, output, stages=STAGES) -> list:
+    records = []
+    for kind in kinds:
+        for size in sizes:
+            documents = generate_corpus(kind, size)
+            corpus_bytes = sum(len(document.encode()) for document in documents)
+            hit_rate = round(block_hit_rate(documents), 4)
+            for stage, seconds in benchmark_corpus(documents, repeat, stages).items():
+                record = {
+                    "corpus": kind,
+                    "pages": size,
+                    "bytes": corpus_bytes,
+                    "stage": stage,
+                    "seconds": round(seconds, 6),
+                    "us_per_page": round(seconds / size * 1e6, 2),
+                    "python": platform.python_version(),
+                }
+                if stage == "markdown_to_html_node":
+                    record["block_hit_rate"] = hit_rate
+                records.append(record)
+                print(
+                    f"{kind:>6} {size:>7} pages {stage:<24} {seconds:10.4f}s "
+                    f"{record['us_per_page']:10.1f}us/page"
+                )
+    with open(output, "a") as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000])
+    parser.add_argument(
+        "--corpus", choices=CORPUS_KINDS, nargs="+", default=CORPUS_KINDS
+    )
+    parser.add_argument("--stages", choices=STAGES, nargs="+", default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_output.txt")
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.corpus, args.repeat, args.output, args.stages)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
-import re
 from enum import Enum
 
-BlockType = Enum(
-    "BlockType", ["PARAGRAPH", "HEADING", "CODE", "QUOTE", "ULIST", "OLIST"]
-)
+from patterns import HEADING_PREFIX
+
+
+class BlockType(Enum):
+    PARAGRAPH = 1
+    HEADING = 2
+    CODE = 3
+    QUOTE = 4
+    ULIST = 5
+    OLIST = 6
 
 
 def markdown_to_blocks(markdown) -> list:
@@ -14,37 +20,147 @@ def markdown_to_blocks(markdown) -> list:
     return blocks
 
 
+def scan_blocks(markdown) -> list:
+    blocks = []
+    for block in markdown.split("\n\n"):
+        block = block.strip()
+        if block != "":
+            lines = block.split("\n")
+            blocks.append((lines_to_block_type(block, lines), lines))
+    return blocks
+
+
+def iter_blocks(chunks):
+    # Yields the same blocks as scan_blocks("".join(chunks)) while holding only
+    # the text after the last "\n\n" seen so far
+    pending = []
+    for chunk in chunks:
+        if chunk == "":
+            continue
+        if "\n\n" not in chunk and not (
+            pending and pending[-1].endswith("\n") and chunk.startswith("\n")
+        ):
+            pending.append(chunk)
+            continue
+        pending.append(chunk)
+        pieces = "".join(pending).split("\n\n")
+        pending = [pieces.pop()]
+        for block in pieces:
+            block = block.strip()
+            if block != "":
+                lines = block.split("\n")
+                yield lines_to_block_type(block, lines), lines
+    block = "".join(pending).strip()
+    if block != "":
+        lines = block.split("\n")
+        yield lines_to_block_type(block, lines), lines
+
+
+def scan_mapped_blocks(buffer, start=0):
+    # Finds blank-line boundaries on the raw UTF-8 bytes, so only one block at
+    # a time is decoded; buffer must not contain "\r" line endings
+    end = len(buffer)
+    while start <= end:
+        stop = buffer.find(b"\n\n", start)
+        if stop == -1:
+            stop = end
+        block = buffer[start:stop].decode().strip()
+        if block != "":
+            lines = block.split("\n")
+            yield lines_to_block_type(block, lines), lines
+        start = stop + 2
+
+
+def front_matter_end(markdown) -> int:
+    # The length of the front matter opened by a "---" first line and closed by
+    # the next "---" line, in text or mapped bytes, or 0 without one
+    if isinstance(markdown, str):
+        fence, newline = "---", "\n"
+    else:
+        fence, newline = b"---", b"\n"
+    if markdown[:4] != fence + newline:
+        return 0
+    start = 4
+    while True:
+        stop = markdown.find(newline, start)
+        if stop == -1:
+            return len(markdown) if markdown[start:].rstrip() == fence else 0
+        if markdown[start:stop].rstrip() == fence:
+            return stop + 1
+        start = stop + 1
+
+
+def parse_front_matter(lines) -> dict:
+    # Lines between the fences are "key: value" pairs, or a "key:" line
+    # followed by "- item" lines for a list; blank and "#" lines are skipped
+    front_matter = {}
+    key = None
+    for line in lines:
+        item = line.strip()
+        if item == "" or item.startswith("#"):
+            continue
+        if item == "-" or item.startswith("- "):
+            value = front_matter.get(key)
+            if value == "":
+                value = front_matter[key] = []
+            if not isinstance(value, list):
+                raise SyntaxError(f"Front matter list item without a key: {line!r}")
+            value.append(item[1:].strip())
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            raise SyntaxError(f"Invalid front matter line: {line!r}")
+        key = key.strip().lower()
+        front_matter[key] = value.strip()
+    return front_matter
+
+
 def block_to_block_type(markdown) -> BlockType:
-    mdlines = markdown.split("\n")
-    if len(re.findall(r"^#{1,6}\s+.+$", markdown, flags=re.MULTILINE)) > 0:
-        return BlockType.HEADING
-    elif len(re.findall(r"`{3}.+`{3}", markdown, flags=re.S)) > 0:
-        return BlockType.CODE
-    elif len(re.findall(r"^>.*$", markdown, flags=re.MULTILINE)) > 0:
-        quoteblock = True
-        for line in markdown.split("\n"):
-            if not line.startswith(">"):
-                quoteblock = False
-        if quoteblock:
-            return BlockType.QUOTE
+    return lines_to_block_type(markdown, markdown.split("\n"))
+
+
+def lines_to_block_type(markdown, lines) -> BlockType:
+    quoteblock = ulistblock = olistblock = True
+    has_quote = has_dash = has_number = False
+    # A heading marker without text only counts when a later line has text,
+    # because the whitespace after the marker may span line breaks
+    heading_pending = False
+    for i, line in enumerate(lines):
+        if line == "":
+            quoteblock = ulistblock = olistblock = False
+            continue
+        if heading_pending:
+            return BlockType.HEADING
+        first = line[0]
+        if first == "#":
+            heading = HEADING_PREFIX.match(line)
+            if heading is not None:
+                tail = line[heading.end() :]
+                if tail == "" or (tail.isspace() and len(tail) == 1):
+                    heading_pending = True
+                elif tail[0].isspace():
+                    return BlockType.HEADING
+        if first == ">":
+            has_quote = True
         else:
-            return BlockType.PARAGRAPH
-    elif len(re.findall(r"^-.*$", markdown, flags=re.MULTILINE)) > 0:
-        ulistblock = True
-        for line in mdlines:
+            quoteblock = False
+        if first == "-":
+            has_dash = True
             if not line.startswith("- "):
                 ulistblock = False
-        if ulistblock:
-            return BlockType.ULIST
         else:
-            return BlockType.PARAGRAPH
-    elif len(re.findall(r"^(\d+).+$", markdown, flags=re.MULTILINE)) > 0:
-        olistblock = True
-        for i in range(0, len(mdlines)):
-            if not mdlines[i].startswith(f"{i + 1}. "):
-                olistblock = False
-        if olistblock:
-            return BlockType.OLIST
-        else:
-            return BlockType.PARAGRAPH
+            ulistblock = False
+        if first.isdecimal() and len(line) > 1:
+            has_number = True
+        if olistblock and not line.startswith(f"{i + 1}. "):
+            olistblock = False
+    code_start = markdown.find("```")
+    if code_start != -1 and markdown.find("```", code_start + 4) != -1:
+        return BlockType.CODE
+    elif has_quote:
+        return BlockType.QUOTE if quoteblock else BlockType.PARAGRAPH
+    elif has_dash:
+        return BlockType.ULIST if ulistblock else BlockType.PARAGRAPH
+    elif has_number:
+        return BlockType.OLIST if olistblock else BlockType.PARAGRAPH
     return BlockType.PARAGRAPH
@@ -0,0 +1,253 @@
+import functools
+import os
+
+import profiling
+from assets import sync_static
+from listings import generate_listings
+from output import OutputWriter, make_directories
+from references import referring_pages
+from utils import file_hash, generate_page, remove_output, render_page
+
+MANIFEST_NAME = ".ssg-manifest.json"
+MANIFEST_VERSION = 6
+# What render_page learns about a page, kept in the manifest so pages that
+# are not re-rendered still count towards link checks and the search index
+PAGE_FIELDS = ("title", "date", "tags", "references", "headings", "terms")
+
+
+def discover_pages(dir_path_content, dest_dir_path, directories=None) -> list:
+    pages = []
+    with os.scandir(dir_path_content) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.is_dir():
+                dest = os.path.join(dest_dir_path, entry.name)
+                if directories is not None:
+                    directories.append(dest)
+                pages.extend(discover_pages(entry.path, dest, directories))
+            else:
+                name = entry.name.replace(".md", ".html")
+                pages.append((entry.path, os.path.join(dest_dir_path, name)))
+    return pages
+
+
+def render_pages(
+    pages,
+    template_path,
+    basepath,
+    jobs=1,
+    cache_dir=None,
+    use_mmap=False,
+    search=False,
+) -> dict:
+    make_directories(dest for _, dest in pages)
+    rendered = {}
+    if jobs == 1 or len(pages) < 2:
+        with OutputWriter() as writer:
+            for source, dest in pages:
+                rendered[source] = generate_page(
+                    source,
+                    template_path,
+                    dest,
+                    basepath,
+                    cache_dir,
+                    use_mmap,
+                    writer,
+                    search,
+                )
+        return rendered
+    from concurrent.futures import ProcessPoolExecutor
+
+    profiler = profiling.active
+    worker = render_page
+    if profiler is not None:
+        worker = functools.partial(profiling.profiled, render_page)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                worker,
+                source,
+                template_path,
+                dest,
+                basepath,
+                cache_dir,
+                use_mmap,
+                search=search,
+            )
+            for source, dest in pages
+        ]
+        try:
+            for (source, dest), future in zip(pages, futures):
+                print(f"Generating page from {source} to {dest} using {template_path}")
+                result = future.result()
+                if profiler is not None:
+                    result, profile = result
+                    profiler.merge(profile)
+                rendered[source] = result
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+    return rendered
+
+
+def load_manifest(dest_dir_path) -> dict:
+    import json
+
+    try:
+        with open(os.path.join(dest_dir_path, MANIFEST_NAME), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_manifest(dest_dir_path, manifest) -> None:
+    import json
+
+    path = os.path.join(dest_dir_path, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def manifest_pages(manifest) -> tuple:
+    # Page records by output path, and every output path
+    pages = {entry["dest"]: entry for entry in manifest.get("pages", {}).values()}
+    outputs = list(pages) + list(manifest.get("assets", {}))
+    return pages, outputs + list(manifest.get("listings", {}))
+
+
+def source_entry(path, previous) -> dict:
+    stat = os.stat(path)
+    if (
+        previous is not None
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime") == stat.st_mtime_ns
+    ):
+        return dict(previous)
+    return {"hash": file_hash(path), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def generate_site_incremental(
+    static_path,
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    jobs=1,
+    asset_method="copy",
+    checksum=False,
+    cache_dir=None,
+    use_mmap=False,
+    search=False,
+    site_url=None,
+) -> list:
+    manifest = load_manifest(dest_dir_path)
+    os.makedirs(dest_dir_path, exist_ok=True)
+    previous_assets = set(manifest.get("assets", {}))
+    manifest["assets"], _ = sync_static(
+        static_path,
+        dest_dir_path,
+        manifest.get("assets", {}),
+        asset_method,
+        checksum,
+        [
+            os.path.relpath(dest, dest_dir_path)
+            for _, dest in discover_pages(dir_path_content, dest_dir_path)
+        ],
+    )
+    return generate_pages_incremental(
+        dir_path_content,
+        template_path,
+        dest_dir_path,
+        basepath,
+        jobs,
+        manifest,
+        cache_dir,
+        use_mmap,
+        moved=previous_assets.symmetric_difference(manifest["assets"]),
+        search=search,
+        site_url=site_url,
+    )
+
+
+def generate_pages_incremental(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    jobs=1,
+    manifest=None,
+    cache_dir=None,
+    use_mmap=False,
+    moved=(),
+    search=False,
+    site_url=None,
+) -> list:
+    if manifest is None:
+        manifest = load_manifest(dest_dir_path)
+    previous_pages = manifest.get("pages", {})
+    template_hash = file_hash(template_path)
+    rebuild_all = (
+        manifest.get("template") != template_hash
+        or manifest.get("basepath") != basepath
+        or (search and not manifest.get("search"))
+    )
+    pages = {}
+    planned = {}
+    stale = []
+    for source, dest in discover_pages(dir_path_content, dest_dir_path):
+        relative_source = os.path.relpath(source, dir_path_content)
+        previous = previous_pages.get(relative_source)
+        entry = source_entry(source, previous)
+        entry["dest"] = os.path.relpath(dest, dest_dir_path)
+        if (
+            rebuild_all
+            or previous is None
+            or previous["hash"] != entry["hash"]
+            or not os.path.exists(dest)
+        ):
+            stale.append((source, dest))
+        else:
+            entry.update(
+                (field, previous[field]) for field in PAGE_FIELDS if field in previous
+            )
+        pages[relative_source] = entry
+        planned[relative_source] = (source, dest)
+    current_dests = {entry["dest"] for entry in pages.values()}
+    # Pages linking to an output that appeared or disappeared are rendered
+    # again, found through the references recorded when they were parsed
+    moved = set(moved)
+    moved.update({entry["dest"] for entry in previous_pages.values()} ^ current_dests)
+    for relative_source in sorted(referring_pages(previous_pages, moved)):
+        if relative_source in planned and planned[relative_source] not in stale:
+            stale.append(planned[relative_source])
+    rendered = render_pages(
+        stale, template_path, basepath, jobs, cache_dir, use_mmap, search
+    )
+    for relative_source, (source, _) in planned.items():
+        if source in rendered:
+            pages[relative_source].update(rendered[source])
+    assets = manifest.get("assets", {})
+    for relative_source, previous in previous_pages.items():
+        dest = previous["dest"]
+        if relative_source not in pages and dest not in current_dests | set(assets):
+            remove_output(dest_dir_path, dest)
+    manifest["listings"], _ = generate_listings(
+        {entry["dest"]: entry for entry in pages.values()},
+        template_path,
+        dest_dir_path,
+        basepath,
+        manifest.get("listings"),
+        site_url,
+    )
+    manifest.update(
+        version=MANIFEST_VERSION,
+        template=template_hash,
+        basepath=basepath,
+        search=search,
+        pages=pages,
+    )
+    save_manifest(dest_dir_path, manifest)
+    return [dest for _, dest in stale]
@@ -0,0 +1,66 @@
+import os
+
+# Bump whenever markdown_to_html_node or the page record it collects changes,
+# so bodies rendered by an older parser are never reused
+PARSER_VERSION = 8
+DEFAULT_CACHE_DIR = "./.cache/pages/"
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class RenderCache:
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def key(self, markdown, basepath, search=False) -> str:
+        import hashlib
+
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{basepath}\0{search}\0".encode())
+        digest.update(markdown.encode() if isinstance(markdown, str) else markdown)
+        return digest.hexdigest()
+
+    def entry_path(self, key) -> str:
+        return os.path.join(self.path, key[:2], key[2:] + ".json")
+
+    def get(self, key):
+        import json
+
+        path = self.entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            body, page = entry["body"], entry["page"]
+            os.utime(path)
+        except (KeyError, OSError, ValueError):
+            return None
+        return body, page
+
+    def put(self, key, body, page) -> None:
+        import json
+
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"body": body, "page": page}, f)
+        os.replace(temp_path, path)
+
+    def prune(self) -> int:
+        entries = []
+        total = 0
+        if not os.path.isdir(self.path):
+            return 0
+        for directory, _, files in os.walk(self.path):
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
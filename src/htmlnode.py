@@ -1,4 +1,6 @@
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None) -> None:
         self.tag = tag
         self.value = value
@@ -11,6 +13,12 @@ class HTMLNode:
     def to_html(self) -> str:
         raise NotImplementedError("Not implemented on HTMLNode")
 
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, fp) -> None:
+        fp.writelines(self.iter_html())
+
     def props_to_html(self) -> str:
         props = self.props
         if props is not None and isinstance(props, dict):
@@ -20,8 +28,13 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None) -> None:
-        super().__init__(tag, value, None, props)
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self) -> str:
         if self.value is None:
@@ -33,15 +46,39 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None) -> None:
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
 
     def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def open_tag(self) -> str:
         if self.tag is None:
             raise ValueError("'tag' is required in ParentNode")
         elif self.children is None or not isinstance(self.children, list):
             raise ValueError(
                 "'children' are required in ParentNode (list of HTMLNodes)"
             )
-        else:
-            return f'<{self.tag}{self.props_to_html()}>{"".join(list(map(lambda x: x.to_html(), self.children)))}</{self.tag}>'
+        return f"<{self.tag}{self.props_to_html()}>"
+
+    def iter_html(self):
+        # Walks the tree with an explicit stack so deep documents neither
+        # recurse nor copy every nested fragment into its parent's string
+        yield self.open_tag()
+        stack = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, close_tag = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    yield child.open_tag()
+                    stack.append((iter(child.children), f"</{child.tag}>"))
+                    break
+                yield child.to_html()
+            else:
+                stack.pop()
+                yield close_tag
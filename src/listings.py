@@ -0,0 +1,205 @@
+import os
+import posixpath
+
+from htmlnode import LeafNode, ParentNode
+from output import write_file
+from references import page_url
+from template import load_template
+from utils import file_hash, remove_output, slugify
+
+BLOG_DIR = "blog"
+TAGS_DIR = "tags"
+POSTS_PER_PAGE = 10
+FEED_SIZE = 20
+RSS_FEED = "rss.xml"
+ATOM_FEED = "atom.xml"
+
+
+def collect_posts(pages, basepath) -> list:
+    # Dated pages, newest first
+    posts = []
+    for dest in sorted(pages):
+        page = pages[dest]
+        if page.get("date"):
+            posts.append(
+                {
+                    "url": page_url(dest, basepath),
+                    "title": page["title"],
+                    "date": page["date"],
+                    "tags": page.get("tags", []),
+                }
+            )
+    posts.sort(key=lambda post: post["date"], reverse=True)
+    return posts
+
+
+def listing_dest(directory, number) -> str:
+    if number == 1:
+        return posixpath.join(directory, "index.html")
+    return posixpath.join(directory, "page", str(number), "index.html")
+
+
+def paginate(directory, title, posts, basepath, listings) -> None:
+    chunks = [
+        posts[i : i + POSTS_PER_PAGE] for i in range(0, len(posts), POSTS_PER_PAGE)
+    ]
+    for number, chunk in enumerate(chunks, 1):
+        newer = older = None
+        if number > 1:
+            newer = page_url(listing_dest(directory, number - 1), basepath)
+        if number < len(chunks):
+            older = page_url(listing_dest(directory, number + 1), basepath)
+        listings[listing_dest(directory, number)] = {
+            "kind": "listing",
+            "title": title if number == 1 else f"{title} (page {number})",
+            "posts": chunk,
+            "newer": newer,
+            "older": older,
+        }
+
+
+def plan_listings(pages, basepath, site_url=None) -> dict:
+    # Listing and feed outputs, each with the data it is rendered from
+    posts = collect_posts(pages, basepath)
+    if not posts:
+        return {}
+    listings = {}
+    paginate(BLOG_DIR, "Blog", posts, basepath, listings)
+    tags = {}
+    for post in posts:
+        for tag in post["tags"]:
+            slug = slugify(tag)
+            if slug == "":
+                continue
+            name, tagged = tags.setdefault(slug, (tag, []))
+            if not tagged or tagged[-1] is not post:
+                tagged.append(post)
+    for slug, (name, tagged) in sorted(tags.items()):
+        directory = posixpath.join(TAGS_DIR, slug)
+        paginate(directory, f"Posts tagged {name}", tagged, basepath, listings)
+    # Feed readers need absolute URLs, which only the site URL can give
+    if site_url is not None:
+        from urllib.parse import urljoin
+
+        feed = {
+            "kind": "rss",
+            "title": pages.get("index.html", {}).get("title", "Blog"),
+            "url": urljoin(site_url, basepath),
+            "posts": [
+                dict(post, url=urljoin(site_url, post["url"]))
+                for post in posts[:FEED_SIZE]
+            ],
+        }
+        listings[RSS_FEED] = feed
+        listings[ATOM_FEED] = dict(feed, kind="atom")
+    # A content page rendered to the same path takes precedence
+    return {dest: listing for dest, listing in listings.items() if dest not in pages}
+
+
+def listing_html(listing) -> str:
+    items = []
+    for post in listing["posts"]:
+        items.append(
+            ParentNode(
+                "li",
+                [
+                    LeafNode("a", post["title"], {"href": post["url"]}),
+                    LeafNode(None, " "),
+                    LeafNode("time", post["date"], {"datetime": post["date"]}),
+                ],
+            )
+        )
+    children = [LeafNode("h1", listing["title"]), ParentNode("ul", items)]
+    links = []
+    if listing["newer"] is not None:
+        links.append(LeafNode("a", "Newer posts", {"href": listing["newer"]}))
+    if listing["older"] is not None:
+        links.append(LeafNode("a", "Older posts", {"href": listing["older"]}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children).to_html()
+
+
+def rss_feed(feed) -> str:
+    import datetime
+    from email.utils import format_datetime
+    from xml.sax.saxutils import escape
+
+    items = []
+    for post in feed["posts"]:
+        published = datetime.datetime.fromisoformat(post["date"]).replace(
+            tzinfo=datetime.timezone.utc
+        )
+        items.append(
+            f"<item><title>{escape(post['title'])}</title>"
+            f"<link>{escape(post['url'])}</link><guid>{escape(post['url'])}</guid>"
+            f"<pubDate>{format_datetime(published, usegmt=True)}</pubDate></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<rss version="2.0"><channel><title>{escape(feed["title"])}</title>'
+        f"<link>{escape(feed['url'])}</link>"
+        f"<description>{escape(feed['title'])}</description>"
+        f"{''.join(items)}</channel></rss>\n"
+    )
+
+
+def atom_feed(feed) -> str:
+    from xml.sax.saxutils import escape, quoteattr
+
+    # Front matter dates have no time, so every entry is updated at midnight UTC
+    entries = []
+    for post in feed["posts"]:
+        entries.append(
+            f"<entry><title>{escape(post['title'])}</title>"
+            f"<link href={quoteattr(post['url'])}/><id>{escape(post['url'])}</id>"
+            f"<updated>{post['date']}T00:00:00Z</updated></entry>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<title>{escape(feed['title'])}</title>"
+        f"<link href={quoteattr(feed['url'])}/><id>{escape(feed['url'])}</id>"
+        f"<updated>{feed['posts'][0]['date']}T00:00:00Z</updated>"
+        f"<author><name>{escape(feed['title'])}</name></author>"
+        f"{''.join(entries)}</feed>\n"
+    )
+
+
+def render_listing(listing, template_path, basepath) -> str:
+    if listing["kind"] == "rss":
+        return rss_feed(listing)
+    if listing["kind"] == "atom":
+        return atom_feed(listing)
+    template = load_template(template_path, basepath)
+    return template.render(
+        Title=listing["title"], Content=listing_html(listing), TOC=""
+    )
+
+
+def generate_listings(
+    pages, template_path, dest_dir_path, basepath, previous=None, site_url=None
+) -> tuple:
+    import hashlib
+    import json
+
+    # Outputs whose digest matches the one in previous are left alone
+    previous = previous or {}
+    template_hash = file_hash(template_path)
+    digests = {}
+    written = []
+    for dest, listing in plan_listings(pages, basepath, site_url).items():
+        state = json.dumps([template_hash, basepath, listing], sort_keys=True)
+        digests[dest] = hashlib.sha256(state.encode()).hexdigest()
+        path = os.path.join(dest_dir_path, dest)
+        if previous.get(dest) == digests[dest] and os.path.exists(path):
+            continue
+        print(f"Generating listing {path}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_file(path, render_listing(listing, template_path, basepath))
+        written.append(path)
+    for dest in previous:
+        if dest not in digests and dest not in pages:
+            remove_output(dest_dir_path, dest)
+            written.append(os.path.join(dest_dir_path, dest))
+    return digests, written
@@ -1,17 +1,236 @@
-import sys
+import argparse
+import os
 
-from utils import copy_static, generate_pages_recursive
+import profiling
+from assets import ASSET_METHODS
+from build import generate_site_incremental, load_manifest, manifest_pages
+from cache import DEFAULT_CACHE_BYTES, DEFAULT_CACHE_DIR, RenderCache
+from listings import generate_listings
+from plan import describe_plan, plan_pages, plan_site, run_plan
+from references import check_references, page_index
+from search import build_search_index
+from utils import clean_directory
+
+# The dev server, watcher and asyncio driver pull in http.server, ctypes and
+# asyncio, so they are only imported by the commands that use them
 
 
 def main() -> None:
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    copy_static("./static/", "./docs/")
-    generate_pages_recursive(
-        "./content/",
+    parser = argparse.ArgumentParser(description="Generate the site into ./docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-render pages whose source, template or basepath changed",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="build incrementally, then keep rebuilding what changes",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve pages rendered on demand from ./content/ with live reload",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="watch by polling file stats instead of inotify",
+    )
+    parser.add_argument(
+        "--link",
+        choices=ASSET_METHODS,
+        default="copy",
+        help="how static files are placed in ./docs/",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the planned directory, asset and page tasks without building",
+    )
+    parser.add_argument(
+        "--async-io",
+        action="store_true",
+        help="overlap reading sources, rendering and writing pages with asyncio",
+    )
+    parser.add_argument(
+        "--io-depth",
+        type=int,
+        help="pages and static files in flight at once with --async-io (default 16)",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report links and images pointing at missing pages or static files",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a sharded full-text search index of the pages to ./docs/search/",
+    )
+    parser.add_argument(
+        "--site-url",
+        help="the scheme and host the site is served from, such as "
+        "https://example.com, which the RSS and Atom feeds need",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes rendering pages (0 uses every core)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse parsed page bodies across builds when the markdown is unchanged",
+    )
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+        help="evict the least recently used cache entries beyond this many MB",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="memory-map markdown sources and only decode the blocks being parsed",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build stage per page and print the slowest ones",
+    )
+    parser.add_argument(
+        "--profile-json", metavar="PATH", help="also write the profile as JSON"
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    if args.profile or args.profile_json:
+        profiler = profiling.enable()
+        try:
+            build(args, jobs)
+        finally:
+            profiling.disable()
+        print(profiler.summary())
+        if args.profile_json:
+            profiler.write_json(args.profile_json)
+        return
+    build(args, jobs)
+
+
+def build(args, jobs) -> None:
+    cache_dir = args.cache_dir if args.cache else None
+    try:
+        built = build_site(args, jobs, cache_dir)
+    finally:
+        if cache_dir is not None:
+            RenderCache(cache_dir, args.cache_size * 1024 * 1024).prune()
+    if built is None:
+        return
+    pages, outputs = built
+    if args.search:
+        index = build_search_index(pages, args.basepath)
+        index.write("./docs/")
+        print(f"Indexed {len(index.postings)} terms from {len(pages)} pages")
+    if args.check_links and not check_references(page_index(pages), outputs):
+        raise SystemExit(1)
+
+
+def build_site(args, jobs, cache_dir):
+    if args.dry_run:
+        print(describe_plan(plan_site("./static/", "./content/", "./docs/")))
+        return None
+    if args.serve:
+        from server import serve
+
+        serve("./static/", "./content/", "./src/template.html", args.port, args.poll)
+        return None
+    if args.watch:
+        from watch import SiteWatcher, create_watcher
+
+        site = SiteWatcher(
+            "./static/",
+            "./content/",
+            "./src/template.html",
+            "./docs/",
+            args.basepath,
+            jobs,
+            args.link,
+            cache_dir,
+            args.mmap,
+            args.site_url,
+            args.search,
+        )
+        site.build()
+        roots = ["./content/", "./static/", "./src/template.html"]
+        watcher = create_watcher(roots, args.poll)
+        print(f"Watching {', '.join(roots)} with {type(watcher).__name__}")
+        try:
+            site.run(watcher)
+        except KeyboardInterrupt:
+            pass
+        return None
+    if args.incremental:
+        generate_site_incremental(
+            "./static/",
+            "./content/",
+            "./src/template.html",
+            "./docs/",
+            args.basepath,
+            jobs,
+            args.link,
+            args.checksum,
+            cache_dir,
+            args.mmap,
+            args.search,
+            args.site_url,
+        )
+        return manifest_pages(load_manifest("./docs/"))
+    tasks = plan_site("./static/", "./content/", "./docs/")
+    clean_directory("./docs/")
+    if args.async_io:
+        from pipeline import DEFAULT_CONCURRENCY, run_plan_async
+
+        rendered = run_plan_async(
+            tasks,
+            "./src/template.html",
+            args.basepath,
+            jobs,
+            cache_dir,
+            args.link,
+            args.io_depth or DEFAULT_CONCURRENCY,
+            args.search,
+            args.mmap,
+        )
+    else:
+        rendered = run_plan(
+            tasks,
+            "./src/template.html",
+            args.basepath,
+            jobs,
+            cache_dir,
+            args.mmap,
+            args.link,
+            args.search,
+        )
+    pages, outputs = plan_pages(tasks, rendered, "./docs/")
+    listings, _ = generate_listings(
+        pages,
         "./src/template.html",
         "./docs/",
-        basepath,
+        args.basepath,
+        site_url=args.site_url,
     )
+    return pages, outputs + list(listings)
 
 
 if __name__ == "__main__":
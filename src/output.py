@@ -0,0 +1,164 @@
+import contextlib
+import os
+import threading
+import time
+
+import profiling
+
+WRITE_WORKERS = 4
+COMPARE_SIZE = 1 << 16
+
+
+def make_directories(paths) -> None:
+    for directory in sorted({os.path.dirname(path) for path in paths}):
+        os.makedirs(directory, exist_ok=True)
+
+
+def temp_path_for(path) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class ComparingFile:
+    # Reads path alongside what is written and only opens the temp file at the
+    # first difference, so an identical page is never written or re-read
+    def __init__(self, path) -> None:
+        self.path = path
+        self.temp_path = temp_path_for(path)
+        self.temp = None
+        self.matched = 0
+        self.changed = False
+        try:
+            self.existing = open(path, "rb")
+        except FileNotFoundError:
+            self.existing = None
+            self.temp = open(self.temp_path, "wb")
+
+    def write(self, text) -> None:
+        data = text.encode()
+        if self.temp is None:
+            view = memoryview(data)
+            for start in range(0, len(data), COMPARE_SIZE):
+                chunk = view[start : start + COMPARE_SIZE]
+                if self.existing.read(len(chunk)) != chunk:
+                    self.diverge()
+                    self.temp.write(chunk)
+                    self.temp.write(view[start + len(chunk) :])
+                    return
+                self.matched += len(chunk)
+            return
+        self.temp.write(data)
+
+    def writelines(self, lines) -> None:
+        for text in lines:
+            self.write(text)
+
+    def diverge(self) -> None:
+        self.temp = open(self.temp_path, "wb")
+        self.existing.seek(0)
+        remaining = self.matched
+        while remaining > 0:
+            chunk = self.existing.read(min(remaining, COMPARE_SIZE))
+            self.temp.write(chunk)
+            remaining -= len(chunk)
+
+    def commit(self) -> None:
+        if self.temp is None:
+            # Everything matched, but the old file may still be longer
+            if self.existing.read(1) == b"":
+                self.existing.close()
+                return
+            self.diverge()
+        self.temp.close()
+        if self.existing is not None:
+            self.existing.close()
+        os.replace(self.temp_path, self.path)
+        self.changed = True
+
+    def abort(self) -> None:
+        if self.existing is not None:
+            self.existing.close()
+        if self.temp is not None:
+            self.temp.close()
+            with contextlib.suppress(OSError):
+                os.remove(self.temp_path)
+
+
+@contextlib.contextmanager
+def atomic_output(path):
+    # Moved into place once written, and left alone when unchanged
+    f = ComparingFile(path)
+    try:
+        yield f
+        f.commit()
+    except BaseException:
+        f.abort()
+        raise
+
+
+def write_file(path, text) -> bool:
+    with atomic_output(path) as f:
+        f.write(text)
+    return f.changed
+
+
+def write_page(path, template, slots) -> tuple:
+    start = time.perf_counter()
+    with atomic_output(path) as f:
+        template.write(f, **slots)
+    return f.changed, time.perf_counter() - start
+
+
+# Streams pages to disk with at most two pages in flight per worker
+class OutputWriter:
+    def __init__(self, workers=WRITE_WORKERS) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.pending = []
+        self.written = 0
+        self.unchanged = 0
+
+    def write(self, path, template, slots, source=None) -> None:
+        self.collect()
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(write_page, path, template, slots)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        self.pending.append((future, source))
+
+    def collect(self, wait=False) -> None:
+        # Write errors surface at the next page rather than at close
+        pending = []
+        for future, source in self.pending:
+            if not wait and not future.done():
+                pending.append((future, source))
+                continue
+            changed, seconds = future.result()
+            if changed:
+                self.written += 1
+            else:
+                self.unchanged += 1
+            # Timed in the writer thread, recorded here so the profiler is
+            # only ever used from the rendering thread
+            profiling.record("write", seconds, source)
+        self.pending = pending
+
+    def close(self) -> None:
+        try:
+            self.collect(wait=True)
+        finally:
+            self.pending = []
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if exc_info[0] is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            return
+        self.close()
@@ -0,0 +1,12 @@
+import re
+
+# Every regular expression the pipeline matches with, compiled once on import
+HEADING_PREFIX = re.compile(r"#{1,6}(?!#)")
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+INLINE_DELIMITERS = re.compile(r"\*\*|_|`")
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[(.*?)\]\((.*?)\)")
+IMAGE_SPLIT = re.compile(r"!\[.*?\]\(.*?\)")
+LINK_SPLIT = re.compile(r"(?<!!)\[.*?\]\(.*?\)")
+URL_SCHEME = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:")
+WORD_PATTERN = re.compile(r"\w+")
@@ -0,0 +1,174 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import profiling
+from assets import copy_file
+from output import write_file
+from plan import schedule
+from utils import STREAM_THRESHOLD, render_document, render_page
+
+DEFAULT_CONCURRENCY = 16
+
+
+def read_source(from_path):
+    # Very large pages are left to render_page, which streams them
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        return None
+    with open(from_path, "r") as f:
+        return f.read()
+
+
+def timed(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def render_source(from_path, markdown, template_path, basepath, cache_dir, search):
+    with profiling.page(from_path):
+        return render_document(markdown, template_path, basepath, cache_dir, search)
+
+
+class AsyncBuild:
+    def __init__(
+        self,
+        template_path,
+        basepath,
+        jobs=1,
+        cache_dir=None,
+        asset_method="copy",
+        concurrency=DEFAULT_CONCURRENCY,
+        search=False,
+        use_mmap=False,
+    ) -> None:
+        self.template_path = template_path
+        self.basepath = basepath
+        self.jobs = jobs
+        self.cache_dir = cache_dir
+        self.asset_method = asset_method
+        self.concurrency = concurrency
+        self.search = search
+        self.use_mmap = use_mmap
+        self.pages = {}
+
+    async def run(self, tasks) -> dict:
+        self.loop = asyncio.get_running_loop()
+        self.limit = asyncio.Semaphore(self.concurrency)
+        self.profiler = profiling.active
+        # One rendering thread keeps the profiler's stage stack consistent;
+        # with --jobs the rendering moves to worker processes instead
+        if self.jobs == 1:
+            self.render_executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.render_executor = ProcessPoolExecutor(max_workers=self.jobs)
+        self.io = ThreadPoolExecutor(max_workers=self.concurrency)
+        with self.io, self.render_executor:
+            pending = []
+            try:
+                for wave in schedule(tasks):
+                    await asyncio.gather(
+                        *(
+                            self.loop.run_in_executor(
+                                self.io, os.makedirs, task.dest, 0o777, True
+                            )
+                            for task in wave
+                            if task.kind == "mkdir"
+                        )
+                    )
+                    for task in wave:
+                        if task.kind == "asset":
+                            pending.append(asyncio.create_task(self.copy_asset(task)))
+                        elif task.kind == "page":
+                            pending.append(asyncio.create_task(self.build_page(task)))
+                await asyncio.gather(*pending)
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise
+        return self.pages
+
+    async def copy_asset(self, task) -> None:
+        async with self.limit:
+            await self.loop.run_in_executor(
+                self.io, copy_file, task.source, task.dest, self.asset_method
+            )
+
+    async def render(self, function, *args, **kwargs):
+        call = functools.partial(function, *args, **kwargs)
+        if self.profiler is None or self.jobs == 1:
+            return await self.loop.run_in_executor(self.render_executor, call)
+        result, profile = await self.loop.run_in_executor(
+            self.render_executor, functools.partial(profiling.profiled, call)
+        )
+        self.profiler.merge(profile)
+        return result
+
+    async def build_page(self, task) -> None:
+        async with self.limit:
+            print(
+                f"Generating page from {task.source} to {task.dest} "
+                f"using {self.template_path}"
+            )
+            # Mapped sources are read by render_page in the rendering executor
+            markdown = None
+            if not self.use_mmap:
+                markdown, read_seconds = await self.loop.run_in_executor(
+                    self.io, timed, read_source, task.source
+                )
+            if markdown is None:
+                self.pages[task.source] = await self.render(
+                    render_page,
+                    task.source,
+                    self.template_path,
+                    task.dest,
+                    self.basepath,
+                    self.cache_dir,
+                    self.use_mmap,
+                    search=self.search,
+                )
+                return
+            page, record = await self.render(
+                render_source,
+                task.source,
+                markdown,
+                self.template_path,
+                self.basepath,
+                self.cache_dir,
+                self.search,
+            )
+            _, write_seconds = await self.loop.run_in_executor(
+                self.io, timed, write_file, task.dest, page
+            )
+            # Timed on the I/O threads, recorded here once the page's
+            # profile exists, so only the rendering thread ever opens one
+            profiling.record("read", read_seconds, task.source)
+            profiling.record("write", write_seconds, task.source)
+            self.pages[task.source] = record
+
+
+def run_plan_async(
+    tasks,
+    template_path,
+    basepath,
+    jobs=1,
+    cache_dir=None,
+    asset_method="copy",
+    concurrency=DEFAULT_CONCURRENCY,
+    search=False,
+    use_mmap=False,
+) -> dict:
+    build = AsyncBuild(
+        template_path,
+        basepath,
+        jobs,
+        cache_dir,
+        asset_method,
+        concurrency,
+        search,
+        use_mmap,
+    )
+    return asyncio.run(build.run(tasks))
@@ -0,0 +1,160 @@
+import os
+
+from assets import copy_file
+from build import discover_pages, render_pages
+
+TASK_KINDS = ["mkdir", "asset", "page"]
+
+
+class Task:
+    __slots__ = ("kind", "source", "dest", "deps")
+
+    def __init__(self, kind, source, dest, deps=()) -> None:
+        self.kind = kind
+        self.source = source
+        self.dest = dest
+        self.deps = tuple(deps)
+
+    def __eq__(self, other) -> bool:
+        return (
+            self.kind == other.kind
+            and self.source == other.source
+            and self.dest == other.dest
+            and self.deps == other.deps
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Task(kind: {self.kind}, source: {self.source}, dest: {self.dest}, "
+            f"deps: {self.deps})"
+        )
+
+    def describe(self) -> str:
+        if self.kind == "mkdir":
+            return f"mkdir {self.dest}"
+        return f"{self.kind:<5} {self.source} -> {self.dest}"
+
+
+def scan_assets(static_path, dest_dir_path, directories) -> list:
+    if not os.path.isdir(static_path):
+        return []
+    assets = []
+    with os.scandir(static_path) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            dest = os.path.join(dest_dir_path, entry.name)
+            if entry.is_dir():
+                directories.append(dest)
+                assets.extend(scan_assets(entry.path, dest, directories))
+            else:
+                assets.append((entry.path, dest))
+    return assets
+
+
+def plan_site(static_path, dir_path_content, dest_dir_path) -> list:
+    directories = [dest_dir_path]
+    assets = scan_assets(static_path, dest_dir_path, directories)
+    pages = discover_pages(dir_path_content, dest_dir_path, directories)
+    return plan_tasks(directories, assets, pages)
+
+
+def plan_tasks(directories, assets, pages) -> list:
+    tasks = []
+    planned = set()
+    for directory in directories:
+        directory = os.path.normpath(directory)
+        if directory in planned:
+            continue
+        parent = os.path.dirname(directory)
+        deps = [parent] if parent in planned else []
+        tasks.append(Task("mkdir", None, directory, deps))
+        planned.add(directory)
+    # A page replaces a static file rendered to the same path, as copying the
+    # static tree before rendering always did
+    page_dests = {os.path.normpath(dest) for _, dest in pages}
+    for source, dest in assets:
+        dest = os.path.normpath(dest)
+        if dest not in page_dests:
+            tasks.append(Task("asset", source, dest, [os.path.dirname(dest)]))
+    for source, dest in pages:
+        dest = os.path.normpath(dest)
+        tasks.append(Task("page", source, dest, [os.path.dirname(dest)]))
+    return tasks
+
+
+def schedule(tasks) -> list:
+    # Waves whose dependencies all ran in earlier waves
+    by_dest = {}
+    for task in tasks:
+        if task.dest in by_dest:
+            raise ValueError(
+                f"{task.describe()} conflicts with {by_dest[task.dest].describe()}"
+            )
+        by_dest[task.dest] = task
+    for task in tasks:
+        for dep in task.deps:
+            if dep not in by_dest:
+                raise ValueError(f"{task.describe()} depends on unplanned {dep}")
+    done = set()
+    waves = []
+    remaining = list(tasks)
+    while remaining:
+        wave = [task for task in remaining if done.issuperset(task.deps)]
+        if not wave:
+            raise ValueError(f"Dependency cycle between {len(remaining)} tasks")
+        waves.append(wave)
+        done.update(task.dest for task in wave)
+        remaining = [task for task in remaining if task.dest not in done]
+    return waves
+
+
+def describe_plan(tasks) -> str:
+    lines = []
+    for i, wave in enumerate(schedule(tasks)):
+        lines.append(f"wave {i + 1}: {len(wave)} tasks")
+        lines.extend(f"  {task.describe()}" for task in wave)
+    counts = ", ".join(
+        f"{sum(task.kind == kind for task in tasks)} {kind}" for kind in TASK_KINDS
+    )
+    lines.append(f"{len(tasks)} tasks ({counts})")
+    return "\n".join(lines)
+
+
+def plan_pages(tasks, rendered, dest_dir_path) -> tuple:
+    # Page records by output path relative to dest_dir_path, and every output
+    pages = {}
+    outputs = []
+    for task in tasks:
+        if task.kind == "mkdir":
+            continue
+        dest = os.path.relpath(task.dest, dest_dir_path)
+        if task.kind == "page":
+            pages[dest] = rendered[task.source]
+        outputs.append(dest)
+    return pages, outputs
+
+
+def run_plan(
+    tasks,
+    template_path,
+    basepath,
+    jobs=1,
+    cache_dir=None,
+    use_mmap=False,
+    asset_method="copy",
+    search=False,
+) -> dict:
+    # Nothing depends on a page, so pages are collected as they become ready
+    # and rendered together, letting one process pool serve the whole build
+    pages = []
+    for wave in schedule(tasks):
+        for task in wave:
+            match (task.kind):
+                case "mkdir":
+                    os.makedirs(task.dest, exist_ok=True)
+                case "asset":
+                    copy_file(task.source, task.dest, asset_method)
+                case "page":
+                    pages.append((task.source, task.dest))
+    return render_pages(
+        pages, template_path, basepath, jobs, cache_dir, use_mmap, search
+    )
@@ -0,0 +1,151 @@
+import contextlib
+import time
+
+active = None
+_disabled = contextlib.nullcontext()
+
+
+class Stage:
+    def __init__(self, profiler, name) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+        self.children = 0.0
+
+    def __enter__(self):
+        self.profiler.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        profiler.stack.pop()
+        if profiler.stack:
+            profiler.stack[-1].children += elapsed
+        profiler.record(self.name, elapsed - self.children)
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.stages = {}
+        self.pages = {}
+        self.counters = {}
+        self.stack = []
+        self.page = None
+
+    def stage(self, name) -> Stage:
+        return Stage(self, name)
+
+    def record(self, name, seconds, calls=1, page=None) -> None:
+        total = self.stages.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += calls
+        if page is None:
+            page = self.page
+        elif page in self.pages:
+            # Timed outside the page's own profile, as its writes and reads
+            # on other threads are, so it is added to the page's total too
+            self.pages[page]["seconds"] += seconds
+        if page in self.pages:
+            page_stages = self.pages[page]["stages"]
+            page_stages[name] = page_stages.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def profile_page(self, page):
+        self.page = page
+        self.pages[page] = {"seconds": 0.0, "stages": {}}
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.pages[page]["seconds"] = time.perf_counter() - start
+            self.page = None
+
+    def merge(self, data) -> None:
+        for name, (seconds, calls) in data["stages"].items():
+            total = self.stages.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += calls
+        self.pages.update(data["pages"])
+        for name, amount in data.get("counters", {}).items():
+            self.count(name, amount)
+
+    def to_dict(self) -> dict:
+        return {"stages": self.stages, "pages": self.pages, "counters": self.counters}
+
+    def write_json(self, path) -> None:
+        import json
+
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1, sort_keys=True)
+
+    def summary(self, limit=10) -> str:
+        lines = [f"{'stage':<12} {'seconds':>10} {'calls':>10} {'ms/call':>10}"]
+        stages = sorted(self.stages.items(), key=lambda item: -item[1][0])
+        for name, (seconds, calls) in stages:
+            lines.append(
+                f"{name:<12} {seconds:10.4f} {calls:10d} {seconds / calls * 1e3:10.4f}"
+            )
+        hits = self.counters.get("block_hits", 0)
+        lookups = hits + self.counters.get("block_misses", 0)
+        if lookups:
+            lines.append("")
+            lines.append(
+                f"block memo: {hits} of {lookups} blocks reused "
+                f"({hits / lookups:.1%} hit rate)"
+            )
+        lines.append("")
+        shown = min(limit, len(self.pages))
+        lines.append(f"slowest {shown} of {len(self.pages)} pages")
+        pages = sorted(self.pages.items(), key=lambda item: -item[1]["seconds"])
+        for page, data in pages[:limit]:
+            slowest = max(data["stages"], key=data["stages"].get, default="-")
+            lines.append(f"{data['seconds']:10.4f}s  {slowest:<10} {page}")
+        return "\n".join(lines)
+
+
+def enable() -> Profiler:
+    global active
+    active = Profiler()
+    return active
+
+
+def disable() -> None:
+    global active
+    active = None
+
+
+def profiled(function, *args, **kwargs) -> tuple:
+    # For worker processes, whose profiles the parent merges into its own
+    profiler = enable()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        disable()
+    return result, profiler.to_dict()
+
+
+def stage(name):
+    if active is None:
+        return _disabled
+    return active.stage(name)
+
+
+def record(name, seconds, page=None) -> None:
+    if active is not None:
+        active.record(name, seconds, page=page)
+
+
+def count(name, amount=1) -> None:
+    if active is not None:
+        active.count(name, amount)
+
+
+def page(name):
+    if active is None:
+        return _disabled
+    return active.profile_page(name)
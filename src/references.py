@@ -0,0 +1,106 @@
+import os
+import posixpath
+
+from patterns import URL_SCHEME
+
+
+def output_path(path) -> str:
+    return path.replace(os.sep, "/")
+
+
+def output_names(dest) -> list:
+    # Every target path a link may use to reach dest
+    dest = output_path(dest)
+    if dest == "index.html":
+        return [dest, ""]
+    if dest.endswith("/index.html"):
+        return [dest, dest[: -len("/index.html")]]
+    if dest.endswith(".html"):
+        return [dest, dest[: -len(".html")]]
+    return [dest]
+
+
+def page_url(dest, basepath) -> str:
+    dest = output_path(dest)
+    if dest == "index.html":
+        return basepath
+    if dest.endswith("/index.html"):
+        return basepath + dest[: -len("index.html")]
+    return basepath + dest
+
+
+def resolve_target(page, url):
+    from urllib.parse import unquote
+
+    # None when the url points off the site or back at the page itself
+    if url.startswith("//") or URL_SCHEME.match(url):
+        return None
+    path = unquote(url.split("#", 1)[0].split("?", 1)[0])
+    if path == "":
+        return None
+    if path.startswith("/"):
+        path = path.lstrip("/")
+    else:
+        path = posixpath.join(posixpath.dirname(output_path(page)), path)
+    path = posixpath.normpath(path) if path else ""
+    return "" if path == "." else path
+
+
+# Keyed by output path relative to the output directory
+class ReferenceIndex:
+    def __init__(self, pages=None) -> None:
+        self.pages = {}
+        for page, references in (pages or {}).items():
+            self.add(page, references)
+
+    def add(self, page, references) -> None:
+        self.pages[output_path(page)] = [tuple(reference) for reference in references]
+
+    def targets(self):
+        for page, references in self.pages.items():
+            for kind, url in references:
+                target = resolve_target(page, url)
+                if target is not None:
+                    yield page, kind, url, target
+
+    def reverse(self) -> dict:
+        referrers = {}
+        for page, _, _, target in self.targets():
+            referrers.setdefault(target, set()).add(page)
+        return {target: sorted(pages) for target, pages in referrers.items()}
+
+    def referrers(self, dests) -> set:
+        names = {name for dest in dests for name in output_names(dest)}
+        return {page for page, _, _, target in self.targets() if target in names}
+
+    def broken(self, outputs) -> list:
+        names = {name for dest in outputs for name in output_names(dest)}
+        return [
+            (page, kind, url)
+            for page, kind, url, target in self.targets()
+            if target not in names
+        ]
+
+
+def page_index(pages) -> ReferenceIndex:
+    return ReferenceIndex(
+        {dest: page.get("references", []) for dest, page in pages.items()}
+    )
+
+
+def referring_pages(pages, moved) -> set:
+    index = page_index({entry["dest"]: entry for entry in pages.values()})
+    referrers = index.referrers(moved)
+    return {
+        source
+        for source, entry in pages.items()
+        if output_path(entry["dest"]) in referrers
+    }
+
+
+def check_references(index, outputs) -> bool:
+    broken = index.broken(outputs)
+    for page, kind, url in broken:
+        print(f"Broken {kind} in {page}: {url}")
+    print(f"Checked {len(index.pages)} pages, found {len(broken)} broken references")
+    return not broken
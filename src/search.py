@@ -0,0 +1,100 @@
+import os
+
+from output import write_file
+from references import page_url
+
+SEARCH_DIR = "search"
+SEARCH_VERSION = 1
+SHARD_CHARACTERS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def shard_name(term) -> str:
+    return term[0] if term[0] in SHARD_CHARACTERS else "_"
+
+
+def encode_postings(postings) -> list:
+    # Runs of [page id gap, position count, position gaps...] keep numbers small
+    encoded = []
+    previous_page = 0
+    for page, positions in postings:
+        encoded.append(page - previous_page)
+        encoded.append(len(positions))
+        previous_position = 0
+        for position in positions:
+            encoded.append(position - previous_position)
+            previous_position = position
+        previous_page = page
+    return encoded
+
+
+def decode_postings(encoded) -> list:
+    postings = []
+    page = 0
+    i = 0
+    while i < len(encoded):
+        page += encoded[i]
+        count = encoded[i + 1]
+        positions = []
+        position = 0
+        for gap in encoded[i + 2 : i + 2 + count]:
+            position += gap
+            positions.append(position)
+        postings.append((page, positions))
+        i += 2 + count
+    return postings
+
+
+# One shard per leading character, so a browser fetches only those it needs
+class SearchIndex:
+    def __init__(self) -> None:
+        self.pages = []
+        self.postings = {}
+
+    def add(self, url, title, terms) -> None:
+        page = len(self.pages)
+        self.pages.append([url, title])
+        for term, positions in terms.items():
+            self.postings.setdefault(term, []).append((page, positions))
+
+    def shards(self) -> dict:
+        shards = {}
+        for term in sorted(self.postings):
+            shard = shards.setdefault(shard_name(term), {})
+            shard[term] = encode_postings(self.postings[term])
+        return shards
+
+    def write(self, dest_dir_path) -> int:
+        import json
+
+        directory = os.path.join(dest_dir_path, SEARCH_DIR)
+        os.makedirs(directory, exist_ok=True)
+        shards = self.shards()
+        index = {
+            "version": SEARCH_VERSION,
+            "pages": self.pages,
+            "shards": sorted(shards),
+        }
+        written = write_file(
+            os.path.join(directory, "index.json"),
+            json.dumps(index, separators=(",", ":")),
+        )
+        for name, terms in shards.items():
+            written += write_file(
+                os.path.join(directory, f"{name}.json"),
+                json.dumps(terms, separators=(",", ":")),
+            )
+        # Shards left by an earlier build whose terms are all gone
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name, extension = os.path.splitext(entry.name)
+                if extension == ".json" and name != "index" and name not in shards:
+                    os.remove(entry.path)
+        return written
+
+
+def build_search_index(pages, basepath) -> SearchIndex:
+    index = SearchIndex()
+    for dest in sorted(pages):
+        page = pages[dest]
+        index.add(page_url(dest, basepath), page["title"], page["terms"])
+    return index
@@ -0,0 +1,301 @@
+import html
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from build import discover_pages
+from listings import (
+    ATOM_FEED,
+    BLOG_DIR,
+    RSS_FEED,
+    TAGS_DIR,
+    plan_listings,
+    render_listing,
+)
+from template import load_template
+from utils import PageData, markdown_to_html_node, page_slots
+from watch import create_watcher
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    "<script>new EventSource("
+    f'"{RELOAD_PATH}"'
+    ").onmessage = () => location.reload();</script>"
+)
+
+
+class PageCache:
+    def __init__(self, maxsize=256) -> None:
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value) -> None:
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class Reloader:
+    def __init__(self) -> None:
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self) -> None:
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def file_version(path) -> tuple:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class DevSite:
+    def __init__(
+        self,
+        static_path,
+        dir_path_content,
+        template_path,
+        cache_size=256,
+        site_url=None,
+    ) -> None:
+        self.static_path = static_path
+        self.content_path = dir_path_content
+        self.template_path = template_path
+        self.site_url = site_url
+        self.cache = PageCache(cache_size)
+        self.records = {}
+        self.reloader = Reloader()
+
+    def resolve(self, url_path) -> tuple:
+        relative = os.path.normpath(unquote(url_path).lstrip("/"))
+        if relative.startswith(".."):
+            return None, None
+        relative = "" if relative == "." else relative
+        content = os.path.join(self.content_path, relative)
+        if os.path.isdir(content):
+            if not url_path.endswith("/"):
+                return "redirect", url_path + "/"
+            content = os.path.join(content, "index.md")
+            if os.path.isfile(content):
+                return "page", content
+        if relative.endswith(".html"):
+            source = os.path.join(self.content_path, relative[: -len(".html")] + ".md")
+            if os.path.isfile(source):
+                return "page", source
+        static = os.path.join(self.static_path, relative)
+        if os.path.isfile(static):
+            return "static", static
+        # Listings and feeds only exist in the metadata of every page, which
+        # is only worth collecting for the paths they are written to
+        top = relative.split(os.sep, 1)[0]
+        if top not in (BLOG_DIR, TAGS_DIR) and relative not in (RSS_FEED, ATOM_FEED):
+            return None, None
+        listings = self.listings()
+        index = posixpath.join(relative, "index.html")
+        if index in listings:
+            if not url_path.endswith("/"):
+                return "redirect", url_path + "/"
+            return "listing", listings[index]
+        if relative in listings and not url_path.endswith("/"):
+            return "listing", listings[relative]
+        return None, None
+
+    def page_record(self, source):
+        version = file_version(source)
+        entry = self.records.get(source)
+        if entry is None or entry[0] != version:
+            with open(source, "r") as f:
+                markdown = f.read()
+            data = PageData()
+            try:
+                markdown_to_html_node(markdown, "/", data)
+                record = data.record()
+            except Exception:
+                record = None
+            entry = self.records[source] = (version, record)
+        return entry[1]
+
+    def listings(self) -> dict:
+        pages = {}
+        for source, dest in discover_pages(self.content_path, ""):
+            record = self.page_record(source)
+            if record is not None:
+                pages[dest.replace(os.sep, "/")] = record
+        return plan_listings(pages, "/", self.site_url)
+
+    def render_listing(self, listing) -> bytes:
+        return render_listing(listing, self.template_path, "/").encode()
+
+    def render(self, source) -> bytes:
+        version = (file_version(source), file_version(self.template_path))
+        body = self.cache.get(source, version)
+        if body is None:
+            with open(source, "r") as f:
+                markdown = f.read()
+            data = PageData()
+            content = markdown_to_html_node(markdown, "/", data).to_html()
+            template = load_template(self.template_path, "/")
+            page = data.record()
+            body = template.render(**page_slots(template, page, content)).encode()
+            self.cache.put(source, version, body)
+        return body
+
+    def watch(self, poll=False) -> threading.Thread:
+        watcher = create_watcher(
+            [self.content_path, self.static_path, self.template_path], poll
+        )
+
+        def run():
+            while True:
+                if watcher.poll():
+                    self.reloader.notify()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def inject_reload(html) -> bytes:
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + RELOAD_SCRIPT.encode()
+    return html[:index] + RELOAD_SCRIPT.encode() + html[index:]
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    site = None
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == RELOAD_PATH:
+            self.stream_reloads()
+            return
+        self.send_resource(path)
+
+    def do_HEAD(self) -> None:
+        # send_body leaves out the body, and the reload stream is never opened
+        path = urlsplit(self.path).path
+        if path == RELOAD_PATH:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            return
+        self.send_resource(path)
+
+    def send_resource(self, path) -> None:
+        kind, target = self.site.resolve(path)
+        if kind == "redirect":
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", target)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif kind == "page":
+            try:
+                body = inject_reload(self.site.render(target))
+                status = HTTPStatus.OK
+            except Exception as error:
+                error = html.escape(repr(error))
+                body = inject_reload(f"<pre>{error}</pre>".encode())
+                status = HTTPStatus.INTERNAL_SERVER_ERROR
+            self.send_body(status, "text/html; charset=utf-8", body)
+        elif kind == "listing":
+            body = self.site.render_listing(target)
+            if target["kind"] == "listing":
+                body = inject_reload(body)
+                content_type = "text/html; charset=utf-8"
+            else:
+                content_type = f"application/{target['kind']}+xml"
+            self.send_body(HTTPStatus.OK, content_type, body)
+        elif kind == "static":
+            with open(target, "rb") as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(target)[0] or "application/octet-stream"
+            self.send_body(HTTPStatus.OK, content_type, body)
+        else:
+            self.send_body(HTTPStatus.NOT_FOUND, "text/plain", b"Not found")
+
+    def send_body(self, status, content_type, body) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def stream_reloads(self) -> None:
+        reloader = self.site.reloader
+        version = reloader.version
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            while True:
+                current = reloader.wait(version, timeout=15)
+                if current == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = current
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def create_server(site, host="localhost", port=8888) -> ThreadingHTTPServer:
+    handler = type("SiteRequestHandler", (DevRequestHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(
+    static_path, dir_path_content, template_path, port=8888, poll=False
+) -> None:
+    site = DevSite(
+        static_path,
+        dir_path_content,
+        template_path,
+        site_url=f"http://localhost:{port}",
+    )
+    site.watch(poll)
+    server = create_server(site, port=port)
+    print(f"Serving {dir_path_content} on http://localhost:{port}/ with live reload")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,54 @@
+import functools
+import os
+
+from patterns import SLOT_PATTERN
+
+
+class Template:
+    def __init__(self, parts) -> None:
+        self.parts = tuple(parts)
+        self.slots = frozenset(self.parts[1::2])
+
+    def __repr__(self) -> str:
+        return f"Template(parts: {self.parts})"
+
+    def render(self, **slots) -> str:
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            parts[i] = slots.get(parts[i], f"{{{{ {parts[i]} }}}}")
+        return "".join(parts)
+
+    def write(self, fp, **slots) -> None:
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                fp.write(part)
+            elif part not in slots:
+                fp.write(f"{{{{ {part} }}}}")
+            elif hasattr(slots[part], "write_html"):
+                slots[part].write_html(fp)
+            else:
+                fp.write(slots[part])
+
+
+def compile_template(template, basepath="/") -> Template:
+    parts = SLOT_PATTERN.split(template)
+    for i in range(0, len(parts), 2):
+        parts[i] = (
+            parts[i]
+            .replace('href="/', f'href="{basepath}')
+            .replace('src="/', f'src="{basepath}')
+        )
+    return Template(parts)
+
+
+@functools.lru_cache(maxsize=16)
+def compile_template_file(template_path, basepath, mtime, size) -> Template:
+    with open(template_path, "r") as f:
+        return compile_template(f.read(), basepath)
+
+
+def load_template(template_path, basepath) -> Template:
+    stat = os.stat(template_path)
+    return compile_template_file(
+        template_path, basepath, stat.st_mtime_ns, stat.st_size
+    )
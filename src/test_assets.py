@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from assets import copy_file, sync_static
+
+
+class TestAssetSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.docs)
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_sync_copies_everything_first(self):
+        assets, copied = sync_static(self.static, self.docs)
+        self.assertListEqual(copied, [os.path.join("images", "a.png"), "index.css"])
+        self.assertListEqual(sorted(assets), sorted(copied))
+        self.assertEqual(self.read(os.path.join(self.docs, "index.css")), "body {}")
+        self.assertEqual(
+            os.stat(os.path.join(self.docs, "index.css")).st_mtime_ns,
+            os.stat(os.path.join(self.static, "index.css")).st_mtime_ns,
+        )
+
+    def test_sync_skips_unchanged(self):
+        sync_static(self.static, self.docs)
+        _, copied = sync_static(self.static, self.docs)
+        self.assertListEqual(copied, [])
+
+    def test_sync_copies_changed(self):
+        sync_static(self.static, self.docs)
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        _, copied = sync_static(self.static, self.docs)
+        self.assertListEqual(copied, ["index.css"])
+        self.assertEqual(
+            self.read(os.path.join(self.docs, "index.css")), "body { margin: 0 }"
+        )
+
+    def test_sync_removes_stale(self):
+        previous, _ = sync_static(self.static, self.docs)
+        self.write(os.path.join(self.docs, "page.html"), "generated page")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        assets, _ = sync_static(self.static, self.docs, previous)
+        self.assertListEqual(list(assets), ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "page.html")))
+
+    def test_checksum_detects_same_size_changes(self):
+        sync_static(self.static, self.docs)
+        dest = os.path.join(self.docs, "index.css")
+        mtime = os.stat(dest).st_mtime_ns
+        self.write(dest, "body []")
+        os.utime(dest, ns=(mtime, mtime))
+        self.assertListEqual(sync_static(self.static, self.docs)[1], [])
+        self.assertListEqual(
+            sync_static(self.static, self.docs, checksum=True)[1], ["index.css"]
+        )
+        self.assertEqual(self.read(dest), "body {}")
+
+    def test_hardlink_never_writes_through_to_source(self):
+        sync_static(self.static, self.docs, method="hardlink")
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.docs, "index.css")
+        self.assertTrue(os.path.samefile(source, dest))
+        copy_file(os.path.join(self.static, "images", "a.png"), dest)
+        self.assertEqual(self.read(source), "body {}")
+        self.assertEqual(self.read(dest), "png")
+
+    def test_reflink_falls_back_to_copy(self):
+        source = os.path.join(self.static, "index.css")
+        dest = os.path.join(self.docs, "index.css")
+        self.assertIn(
+            copy_file(source, dest, "reflink"),
+            ["reflink", "copy_file_range", "copy"],
+        )
+        self.assertEqual(self.read(dest), "body {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from benchmark import CORPUS_KINDS, STAGES, generate_corpus, run_benchmarks
+from utils import markdown_to_html_node
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_corpus_deterministic(self):
+        self.assertListEqual(generate_corpus("mixed", 3), generate_corpus("mixed", 3))
+        self.assertNotEqual(generate_corpus("mixed", 1), generate_corpus("code", 1))
+
+    def test_generate_corpus_is_valid_markdown(self):
+        for kind in CORPUS_KINDS:
+            for document in generate_corpus(kind, 5):
+                self.assertTrue(document.startswith("# "))
+                markdown_to_html_node(document).to_html()
+
+    def test_run_benchmarks_writes_records(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench_output.txt")
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_benchmarks([2], ["inline"], 1, output)
+            with open(output) as f:
+                records = [json.loads(line) for line in f]
+        self.assertListEqual([record["stage"] for record in records], STAGES)
+        self.assertTrue(all(record["pages"] == 2 for record in records))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,15 @@
 import unittest
 
-from blocks import BlockType, block_to_block_type, markdown_to_blocks
+from blocks import (
+    BlockType,
+    block_to_block_type,
+    iter_blocks,
+    markdown_to_blocks,
+    front_matter_end,
+    parse_front_matter,
+    scan_blocks,
+    scan_mapped_blocks,
+)
 
 
 class TestBlocks(unittest.TestCase):
@@ -140,3 +149,105 @@ list
         self.assertEqual(
             block_to_block_type(markdown_to_blocks(md)[0]), BlockType.PARAGRAPH
         )
+
+    def test_block_to_block_type_heading_marker_before_text(self):
+        self.assertEqual(block_to_block_type("#\nText below"), BlockType.HEADING)
+        self.assertEqual(block_to_block_type("Text above\n#"), BlockType.PARAGRAPH)
+
+    def test_scan_blocks(self):
+        md = """
+# Heading
+
+Paragraph text
+on two lines
+
+- one
+- two
+
+```
+code
+```
+"""
+        self.assertListEqual(
+            scan_blocks(md),
+            [
+                (BlockType.HEADING, ["# Heading"]),
+                (BlockType.PARAGRAPH, ["Paragraph text", "on two lines"]),
+                (BlockType.ULIST, ["- one", "- two"]),
+                (BlockType.CODE, ["```", "code", "```"]),
+            ],
+        )
+
+    def test_scan_blocks_matches_block_to_block_type(self):
+        md = """
+> quote
+not quote
+
+1. one
+2. two
+
+1. one
+3. three
+
+- list
+-bad
+"""
+        self.assertListEqual(
+            [block_type for block_type, _ in scan_blocks(md)],
+            [block_to_block_type(block) for block in markdown_to_blocks(md)],
+        )
+
+    def test_iter_blocks_matches_scan_blocks_for_any_chunking(self):
+        md = (
+            "# Heading\n\n\nParagraph\ntext\n\n```\ncode\n\nmore\n```"
+            "\n\n- a\n- b\n"
+        )
+        for size in range(1, len(md) + 1):
+            chunks = [md[i : i + size] for i in range(0, len(md), size)]
+            self.assertListEqual(list(iter_blocks(chunks)), scan_blocks(md))
+
+    def test_iter_blocks_is_lazy(self):
+        def chunks():
+            yield "# Title\n\nfirst"
+            yield "\n\nsecond"
+            raise AssertionError("read past the second block")
+
+        blocks = iter_blocks(chunks())
+        self.assertEqual(next(blocks), (BlockType.HEADING, ["# Title"]))
+        self.assertEqual(next(blocks), (BlockType.PARAGRAPH, ["first"]))
+
+    def test_scan_mapped_blocks_matches_scan_blocks(self):
+        md = "\n# Héading\n\n\n\nParagraph\u2003\ntext\n\n- a\n- b\n\n"
+        self.assertListEqual(list(scan_mapped_blocks(md.encode())), scan_blocks(md))
+        self.assertListEqual(list(scan_mapped_blocks(b"")), [])
+
+    def test_parse_front_matter(self):
+        self.assertDictEqual(
+            parse_front_matter(["Title: Tom: a mistake", "", "# note", "tags: a, b"]),
+            {"title": "Tom: a mistake", "tags": "a, b"},
+        )
+        self.assertDictEqual(parse_front_matter([]), {})
+        with self.assertRaisesRegex(SyntaxError, "Invalid front matter line"):
+            parse_front_matter(["no separator"])
+
+    def test_parse_front_matter_lists(self):
+        self.assertDictEqual(
+            parse_front_matter(["tags:", "  - a", "  - b c", "title: x"]),
+            {"tags": ["a", "b c"], "title": "x"},
+        )
+        with self.assertRaisesRegex(SyntaxError, "without a key"):
+            parse_front_matter(["- a"])
+        with self.assertRaisesRegex(SyntaxError, "without a key"):
+            parse_front_matter(["tags: a", "- b"])
+
+    def test_front_matter_end(self):
+        for markdown, end in [
+            ("---\ntitle: x\n---\n# Heading", 17),
+            ("---\ntitle: x\n---  \n", 19),
+        ]:
+            self.assertEqual(front_matter_end(markdown), end)
+            self.assertEqual(front_matter_end(markdown.encode()), end)
+        self.assertEqual(front_matter_end("---\ntitle: x\n---"), 16)
+        self.assertEqual(front_matter_end("---\ntitle: x"), 0)
+        self.assertEqual(front_matter_end("\n---\ntitle: x\n---"), 0)
+        self.assertEqual(front_matter_end("---"), 0)
@@ -0,0 +1,161 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from build import (
+    MANIFEST_NAME,
+    discover_pages,
+    generate_pages_incremental,
+    generate_site_incremental,
+    load_manifest,
+)
+
+
+class SiteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog", "post"))
+        os.makedirs(self.docs)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(
+            os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nBody"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def build(self, basepath="/"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generated = generate_pages_incremental(
+                self.content, self.template, self.docs, basepath
+            )
+        return [os.path.relpath(path, self.docs) for path in generated]
+
+    def test_discover_pages(self):
+        self.assertListEqual(
+            discover_pages(self.content, self.docs),
+            [
+                (
+                    os.path.join(self.content, "blog", "post", "index.md"),
+                    os.path.join(self.docs, "blog", "post", "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.docs, "index.html"),
+                ),
+            ],
+        )
+
+    def test_first_build_renders_everything(self):
+        self.assertListEqual(
+            self.build(), [os.path.join("blog", "post", "index.html"), "index.html"]
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.docs, MANIFEST_NAME)))
+
+    def test_unchanged_build_renders_nothing(self):
+        self.build()
+        self.assertListEqual(self.build(), [])
+
+    def test_changed_source_renders_only_that_page(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello again")
+        self.assertListEqual(self.build(), ["index.html"])
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn("Hello again", f.read())
+
+    def test_template_or_basepath_change_renders_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+        self.assertEqual(len(self.build("/site/")), 2)
+
+    def test_missing_output_is_rendered(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        self.assertListEqual(self.build(), ["index.html"])
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertListEqual(self.build(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_moved_target_renders_referring_pages(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[About](/about)")
+        self.build()
+        self.write(os.path.join(self.content, "about.md"), "# About")
+        self.assertListEqual(self.build(), ["about.html", "index.html"])
+        os.remove(os.path.join(self.content, "about.md"))
+        self.assertListEqual(self.build(), ["index.html"])
+        self.assertListEqual(
+            load_manifest(self.docs)["pages"]["index.md"]["references"],
+            [["link", "/about"]],
+        )
+
+    def test_search_renders_pages_without_terms(self):
+        self.build()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generated = generate_pages_incremental(
+                self.content, self.template, self.docs, "/", search=True
+            )
+        self.assertEqual(len(generated), 2)
+        self.assertDictEqual(
+            load_manifest(self.docs)["pages"]["index.md"]["terms"],
+            {"home": [0], "hello": [1]},
+        )
+
+    def test_site_incremental_syncs_static(self):
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(static)
+        self.write(os.path.join(static, "index.css"), "body {}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_site_incremental(
+                static, self.content, self.template, self.docs, "/"
+            )
+        self.assertListEqual(list(load_manifest(self.docs)["assets"]), ["index.css"])
+        os.remove(os.path.join(static, "index.css"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generated = generate_site_incremental(
+                static, self.content, self.template, self.docs, "/"
+            )
+        self.assertListEqual(generated, [])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+        self.assertDictEqual(load_manifest(self.docs)["assets"], {})
+
+
+    def test_site_incremental_page_replaces_static_file(self):
+        static = os.path.join(self.tmp.name, "static")
+        os.makedirs(static)
+        self.write(os.path.join(static, "index.html"), "static home")
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_site_incremental(
+                    static, self.content, self.template, self.docs, "/"
+                )
+            with open(os.path.join(self.docs, "index.html")) as f:
+                self.assertIn("<title>Home</title>", f.read())
+        self.assertDictEqual(load_manifest(self.docs)["assets"], {})
+        os.remove(os.path.join(self.content, "index.md"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_site_incremental(
+                static, self.content, self.template, self.docs, "/"
+            )
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(f.read(), "static home")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cache
+from cache import RenderCache
+from utils import render_page
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        store = RenderCache(self.path)
+        key = store.key("# Home", "/")
+        self.assertIsNone(store.get(key))
+        page = {"title": "Home", "references": [["link", "/blog"]], "terms": {}}
+        store.put(key, "<div><h1>Home</h1></div>", page)
+        self.assertEqual(store.get(key), ("<div><h1>Home</h1></div>", page))
+
+    def test_key_covers_basepath_and_parser_version(self):
+        store = RenderCache(self.path)
+        key = store.key("# Home", "/")
+        self.assertNotEqual(key, store.key("# Home", "/blog/"))
+        self.assertNotEqual(key, store.key("# Home", "/", search=True))
+        with mock.patch.object(cache, "PARSER_VERSION", cache.PARSER_VERSION + 1):
+            self.assertNotEqual(key, store.key("# Home", "/"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        store = RenderCache(self.path)
+        key = store.key("# Home", "/")
+        store.put(key, "body", {"title": "Home"})
+        with open(store.entry_path(key), "w") as f:
+            f.write("{")
+        self.assertIsNone(store.get(key))
+
+    def test_prune_evicts_least_recently_used(self):
+        store = RenderCache(self.path, max_bytes=0)
+        keys = [store.key(f"# Page {i}", "/") for i in range(3)]
+        for i, key in enumerate(keys):
+            store.put(key, "x" * 100, {"title": f"Page {i}"})
+            os.utime(store.entry_path(key), ns=(i * 10**9, i * 10**9))
+        size = os.path.getsize(store.entry_path(keys[0]))
+        store.max_bytes = 2 * size
+        store.get(keys[0])
+        self.assertEqual(store.prune(), 1)
+        self.assertIsNone(store.get(keys[1]))
+        self.assertIsNotNone(store.get(keys[0]))
+        self.assertIsNotNone(store.get(keys[2]))
+
+    def test_prune_missing_directory(self):
+        self.assertEqual(RenderCache(self.path).prune(), 0)
+
+
+class TestCachedRender(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.tmp.name, "cache")
+        self.source = os.path.join(self.tmp.name, "index.md")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.dest = os.path.join(self.tmp.name, "index.html")
+        self.write(self.source, "# Home\n\nHello [docs](/docs)")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, "r") as f:
+            return f.read()
+
+    def test_template_change_rewraps_cached_body(self):
+        render_page(self.source, self.template, self.dest, "/", self.cache)
+        first = self.read(self.dest)
+        self.write(self.template, "<h1>{{ Title }}</h1><main>{{ Content }}</main>")
+        with mock.patch(
+            "utils.markdown_to_html_node", side_effect=AssertionError("parsed")
+        ):
+            render_page(self.source, self.template, self.dest, "/", self.cache)
+        self.assertEqual(
+            self.read(self.dest),
+            first.replace("<title>Home</title>", "<h1>Home</h1><main>") + "</main>",
+        )
+
+    def test_matches_uncached_render(self):
+        uncached = os.path.join(self.tmp.name, "uncached.html")
+        render_page(self.source, self.template, uncached, "/blog/")
+        render_page(self.source, self.template, self.dest, "/blog/", self.cache)
+        render_page(self.source, self.template, self.dest, "/blog/", self.cache)
+        self.assertEqual(self.read(self.dest), self.read(uncached))
+
+    def test_markdown_change_misses(self):
+        render_page(self.source, self.template, self.dest, "/", self.cache)
+        self.write(self.source, "# Changed\n\nHello")
+        render_page(self.source, self.template, self.dest, "/", self.cache)
+        self.assertIn("<title>Changed</title>", self.read(self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -12,6 +13,10 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode()
         self.assertEqual(node.props_to_html(), "")
 
+    def test_slots(self):
+        for node in [HTMLNode(), LeafNode("b", "x"), ParentNode("p", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_props_to_html_not_dict(self):
         node = HTMLNode("", "", None, "test")
         self.assertEqual(node.props_to_html(), "")
@@ -77,6 +82,36 @@ class TestParentNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             parent_node.to_html()
 
+    def test_iter_html_fragments(self):
+        parent_node = ParentNode(
+            "div", [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])]
+        )
+        self.assertListEqual(
+            list(parent_node.iter_html()),
+            ["<div>", "<p>", "<b>bold</b>", " text", "</p>", "</div>"],
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode(
+            "ul", [ParentNode("li", [LeafNode("a", "link", {"href": "/x"})])]
+        )
+        buffer = io.StringIO()
+        parent_node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), parent_node.to_html())
+        self.assertEqual(buffer.getvalue(), '<ul><li><a href="/x">link</a></li></ul>')
+
+    def test_to_html_deep_nesting(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "deep</span>"))
+
+    def test_to_html_invalid_grandchild(self):
+        parent_node = ParentNode("div", [ParentNode("span", None)])
+        with self.assertRaises(ValueError):
+            parent_node.to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,153 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from listings import generate_listings, listing_dest, plan_listings
+
+
+def post(title, date, tags=()):
+    return {"title": title, "date": date, "tags": list(tags), "references": []}
+
+
+class TestPlanListings(unittest.TestCase):
+    def setUp(self):
+        self.pages = {
+            "index.html": {"title": "Home", "references": []},
+            "blog/a/index.html": post("A", "2024-01-01", ["Tolkien"]),
+            "blog/b/index.html": post("B", "2024-03-01", ["tolkien", "Old Forest"]),
+            "blog/c/index.html": post("C", "2024-02-01", ["Tolkien", "TOLKIEN"]),
+        }
+
+    def test_no_dated_pages(self):
+        self.assertDictEqual(plan_listings({"index.html": {"title": "Home"}}, "/"), {})
+
+    def test_listing_dest(self):
+        self.assertEqual(listing_dest("blog", 1), "blog/index.html")
+        self.assertEqual(listing_dest("blog", 3), "blog/page/3/index.html")
+
+    def test_blog_and_tags(self):
+        listings = plan_listings(self.pages, "/site/", "https://example.com")
+        self.assertListEqual(
+            sorted(listings),
+            [
+                "atom.xml",
+                "blog/index.html",
+                "rss.xml",
+                "tags/old-forest/index.html",
+                "tags/tolkien/index.html",
+            ],
+        )
+        blog = listings["blog/index.html"]
+        self.assertListEqual([p["title"] for p in blog["posts"]], ["B", "C", "A"])
+        self.assertEqual(blog["posts"][0]["url"], "/site/blog/b/")
+        tolkien = listings["tags/tolkien/index.html"]
+        self.assertEqual(tolkien["title"], "Posts tagged tolkien")
+        self.assertListEqual([p["title"] for p in tolkien["posts"]], ["B", "C", "A"])
+        feed = listings["rss.xml"]
+        self.assertEqual(feed["title"], "Home")
+        self.assertEqual(feed["url"], "https://example.com/site/")
+        self.assertEqual(feed["posts"][0]["url"], "https://example.com/site/blog/b/")
+
+    def test_feeds_need_site_url(self):
+        listings = plan_listings(self.pages, "/")
+        self.assertNotIn("rss.xml", listings)
+        self.assertNotIn("atom.xml", listings)
+        self.assertIn("blog/index.html", listings)
+
+    def test_pagination(self):
+        with mock.patch("listings.POSTS_PER_PAGE", 2):
+            listings = plan_listings(self.pages, "/")
+        first = listings["blog/index.html"]
+        second = listings["blog/page/2/index.html"]
+        self.assertListEqual([p["title"] for p in first["posts"]], ["B", "C"])
+        self.assertIsNone(first["newer"])
+        self.assertEqual(first["older"], "/blog/page/2/")
+        self.assertEqual(second["title"], "Blog (page 2)")
+        self.assertEqual(second["newer"], "/blog/")
+        self.assertIsNone(second["older"])
+
+    def test_pages_take_precedence(self):
+        self.pages["blog/index.html"] = {"title": "My blog", "references": []}
+        listings = plan_listings(self.pages, "/")
+        self.assertNotIn("blog/index.html", listings)
+        self.assertIn("tags/tolkien/index.html", listings)
+
+
+class TestGenerateListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.pages = {
+            "a.html": post("A & B", "2024-01-02", ["x"]),
+            "b.html": post("Other", "2024-01-01", ["y"]),
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, previous=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            digests, written = generate_listings(
+                self.pages,
+                self.template,
+                self.docs,
+                "/",
+                previous,
+                "https://example.com",
+            )
+        return digests, sorted(os.path.relpath(path, self.docs) for path in written)
+
+    def read(self, path):
+        with open(os.path.join(self.docs, path)) as f:
+            return f.read()
+
+    def test_outputs(self):
+        self.generate()
+        self.assertEqual(
+            self.read(os.path.join("tags", "x", "index.html")),
+            "<title>Posts tagged x</title><div><h1>Posts tagged x</h1><ul><li>"
+            '<a href="/a.html">A & B</a> <time datetime="2024-01-02">2024-01-02</time>'
+            "</li></ul></div>",
+        )
+        rss = self.read("rss.xml")
+        self.assertIn("<title>A &amp; B</title>", rss)
+        self.assertIn("<link>https://example.com/a.html</link>", rss)
+        self.assertIn("<pubDate>Tue, 02 Jan 2024 00:00:00 GMT</pubDate>", rss)
+        atom = self.read("atom.xml")
+        self.assertIn('<link href="https://example.com/a.html"/>', atom)
+        self.assertIn("<id>https://example.com/</id>", atom)
+        self.assertIn("<updated>2024-01-02T00:00:00Z</updated>", atom)
+
+    def test_only_changed_listings_are_written(self):
+        digests, written = self.generate()
+        self.assertEqual(len(written), 5)
+        self.assertListEqual(self.generate(digests)[1], [])
+        self.pages["b.html"] = post("Renamed", "2024-01-01", ["y"])
+        digests, written = self.generate(digests)
+        self.assertListEqual(
+            written,
+            [
+                "atom.xml",
+                os.path.join("blog", "index.html"),
+                "rss.xml",
+                os.path.join("tags", "y", "index.html"),
+            ],
+        )
+
+    def test_stale_listings_are_removed(self):
+        digests, _ = self.generate()
+        self.pages["b.html"] = post("Other", "2024-01-01", ["z"])
+        _, written = self.generate(digests)
+        self.assertIn(os.path.join("tags", "y", "index.html"), written)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "tags", "y")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "tags", "z")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import output
+from output import OutputWriter, atomic_output, make_directories, write_file
+from template import compile_template
+
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path, "r") as f:
+            return f.read()
+
+    def test_write_file_skips_identical_content(self):
+        self.assertTrue(write_file(self.path, "<p>one</p>"))
+        os.utime(self.path, ns=(0, 0))
+        inode = os.stat(self.path).st_ino
+        self.assertFalse(write_file(self.path, "<p>one</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(os.stat(self.path).st_ino, inode)
+        self.assertTrue(write_file(self.path, "<p>two</p>"))
+        self.assertEqual(self.read(self.path), "<p>two</p>")
+        self.assertListEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_write_file_same_size_different_content(self):
+        write_file(self.path, "<p>one</p>")
+        self.assertTrue(write_file(self.path, "<p>won</p>"))
+        self.assertEqual(self.read(self.path), "<p>won</p>")
+
+    def test_write_file_prefix_and_longer_file(self):
+        write_file(self.path, "<p>one</p><p>two</p>")
+        self.assertTrue(write_file(self.path, "<p>one</p>"))
+        self.assertEqual(self.read(self.path), "<p>one</p>")
+        with mock.patch("output.COMPARE_SIZE", 4):
+            self.assertTrue(write_file(self.path, "<p>one</p><p>three</p>"))
+        self.assertEqual(self.read(self.path), "<p>one</p><p>three</p>")
+
+    def test_atomic_output_compares_while_streaming(self):
+        write_file(self.path, "<p>one</p><p>two</p>")
+        os.utime(self.path, ns=(0, 0))
+        with mock.patch("output.COMPARE_SIZE", 3):
+            with atomic_output(self.path) as f:
+                f.writelines(["<p>", "one</p>", "<p>two</p>"])
+                self.assertIsNone(f.temp)
+        self.assertFalse(f.changed)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        with atomic_output(self.path) as f:
+            f.writelines(["<p>one</p>", "<p>2</p>"])
+        self.assertTrue(f.changed)
+        self.assertEqual(self.read(self.path), "<p>one</p><p>2</p>")
+        self.assertListEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_atomic_output_keeps_old_page_on_failure(self):
+        write_file(self.path, "<p>old</p>")
+        with self.assertRaises(ValueError):
+            with atomic_output(self.path) as f:
+                f.write("<p>half")
+                raise ValueError("render failed")
+        self.assertEqual(self.read(self.path), "<p>old</p>")
+        self.assertListEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_output_writer(self):
+        write_file(self.path, "<p>same</p>")
+        other = os.path.join(self.tmp.name, "other.html")
+        template = compile_template("<p>{{ Content }}</p>")
+        with OutputWriter(workers=2) as writer:
+            writer.write(self.path, template, {"Content": "same"})
+            writer.write(other, template, {"Content": "new"})
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+        self.assertEqual(self.read(other), "<p>new</p>")
+
+    def test_output_writer_raises_write_errors_early(self):
+        missing = os.path.join(self.tmp.name, "missing", "index.html")
+        template = compile_template("{{ Content }}")
+        with self.assertRaises(FileNotFoundError):
+            with OutputWriter(workers=1) as writer:
+                writer.write(missing, template, {"Content": "page"})
+                writer.executor.submit(lambda: None).result()
+                writer.write(self.path, template, {"Content": "page"})
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_output_writer_bounds_pages_in_flight(self):
+        release = threading.Event()
+        started = []
+        write_page = output.write_page
+
+        def blocked_write(*args):
+            started.append(args[0])
+            release.wait()
+            return write_page(*args)
+
+        template = compile_template("{{ Content }}")
+        with mock.patch("output.write_page", blocked_write):
+            writer = OutputWriter(workers=1)
+            for i in range(2):
+                writer.write(f"{self.path}.{i}", template, {"Content": "page"})
+            thread = threading.Thread(
+                target=writer.write, args=(self.path, template, {"Content": "x"})
+            )
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            release.set()
+            thread.join()
+            writer.close()
+        self.assertEqual(writer.written, 3)
+
+    def test_make_directories(self):
+        make_directories(
+            [
+                os.path.join(self.tmp.name, "a", "b", "index.html"),
+                os.path.join(self.tmp.name, "a", "b", "other.html"),
+                os.path.join(self.tmp.name, "c", "index.html"),
+            ]
+        )
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp.name, "a", "b")))
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp.name, "c")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import contextlib
+import io
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pipeline
+import profiling
+from pipeline import run_plan_async
+from plan import plan_site, run_plan
+from test_build import SiteTestCase
+
+
+class TestAsyncBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        for i in range(6):
+            self.write(
+                os.path.join(self.content, "blog", f"{i}.md"),
+                f"# Post {i}\n\n[Home](/) and **bold**",
+            )
+
+    def read_tree(self, root):
+        tree = {}
+        for directory, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(directory, name)
+                with open(path) as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def build(self, dest, **options):
+        tasks = plan_site(self.static, self.content, dest)
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            run_plan_async(tasks, self.template, "/site/", **options)
+        return log.getvalue()
+
+    def build_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        tasks = plan_site(self.static, self.content, serial)
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_plan(tasks, self.template, "/site/")
+        return serial
+
+    def test_matches_serial_plan(self):
+        serial = self.build_serial()
+        log = self.build(self.docs, concurrency=3)
+        self.assertDictEqual(self.read_tree(self.docs), self.read_tree(serial))
+        self.assertEqual(log.count("Generating page from"), 8)
+
+    def test_matches_serial_plan_with_jobs(self):
+        serial = self.build_serial()
+        self.build(self.docs, jobs=2)
+        self.assertDictEqual(self.read_tree(self.docs), self.read_tree(serial))
+
+    def test_matches_serial_plan_with_mmap(self):
+        serial = self.build_serial()
+        with mock.patch("pipeline.read_source", side_effect=AssertionError("read")):
+            self.build(self.docs, use_mmap=True)
+        self.assertDictEqual(self.read_tree(self.docs), self.read_tree(serial))
+
+    def test_worker_profiles_are_merged(self):
+        profiler = profiling.enable()
+        try:
+            self.build(self.docs, jobs=2)
+        finally:
+            profiling.disable()
+        self.assertEqual(profiler.stages["template"][1], 8)
+
+    def test_profile_records_pages_with_io(self):
+        for jobs in [1, 2]:
+            profiler = profiling.enable()
+            try:
+                self.build(self.docs, jobs=jobs)
+            finally:
+                profiling.disable()
+            self.assertEqual(len(profiler.pages), 8)
+            for stage in ["read", "write"]:
+                self.assertEqual(profiler.stages[stage][1], 8)
+            for data in profiler.pages.values():
+                self.assertIn("write", data["stages"])
+                self.assertGreaterEqual(data["seconds"], sum(data["stages"].values()))
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        active = []
+        peak = []
+        read_source = pipeline.read_source
+
+        def slow_read(path):
+            with lock:
+                active.append(path)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(path)
+            return read_source(path)
+
+        with mock.patch("pipeline.read_source", slow_read):
+            self.build(self.docs, concurrency=2)
+        self.assertEqual(len(peak), 8)
+        self.assertLessEqual(max(peak), 2)
+
+    def test_large_pages_are_streamed(self):
+        with mock.patch("pipeline.STREAM_THRESHOLD", 0), mock.patch(
+            "utils.STREAM_THRESHOLD", 0
+        ), mock.patch(
+            "utils.markdown_to_html_node", side_effect=AssertionError("read whole")
+        ):
+            self.build(self.docs)
+        with open(os.path.join(self.docs, "blog", "0.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<title>Post 0</title><div><h1 id="post-0">Post 0</h1>'
+                '<p><a href="/site/">Home</a> and <b>bold</b></p></div>',
+            )
+
+    def test_render_error_is_raised(self):
+        self.write(os.path.join(self.content, "blog", "3.md"), "# Bad\n\n**open")
+        with self.assertRaises(SyntaxError):
+            self.build(self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "3.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
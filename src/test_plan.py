@@ -0,0 +1,147 @@
+import contextlib
+import io
+import os
+import unittest
+
+from plan import Task, describe_plan, plan_pages, plan_site, run_plan, schedule
+from test_build import SiteTestCase
+from utils import generate_pages_recursive
+
+
+class TestBuildPlan(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "index.html"), "replaced by the page")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def plan(self):
+        return plan_site(self.static, self.content, self.docs)
+
+    def relative(self, path):
+        return None if path is None else os.path.relpath(path, self.tmp.name)
+
+    def test_plan_site(self):
+        self.assertListEqual(
+            [
+                (task.kind, self.relative(task.source), self.relative(task.dest))
+                for task in self.plan()
+            ],
+            [
+                ("mkdir", None, "docs"),
+                ("mkdir", None, os.path.join("docs", "images")),
+                ("mkdir", None, os.path.join("docs", "blog")),
+                ("mkdir", None, os.path.join("docs", "blog", "post")),
+                (
+                    "asset",
+                    os.path.join("static", "images", "a.png"),
+                    os.path.join("docs", "images", "a.png"),
+                ),
+                (
+                    "asset",
+                    os.path.join("static", "index.css"),
+                    os.path.join("docs", "index.css"),
+                ),
+                (
+                    "page",
+                    os.path.join("content", "blog", "post", "index.md"),
+                    os.path.join("docs", "blog", "post", "index.html"),
+                ),
+                (
+                    "page",
+                    os.path.join("content", "index.md"),
+                    os.path.join("docs", "index.html"),
+                ),
+            ],
+        )
+
+    def test_schedule_waves(self):
+        waves = schedule(self.plan())
+        self.assertListEqual(
+            [[self.relative(task.dest) for task in wave] for wave in waves],
+            [
+                ["docs"],
+                [
+                    os.path.join("docs", "images"),
+                    os.path.join("docs", "blog"),
+                    os.path.join("docs", "index.css"),
+                    os.path.join("docs", "index.html"),
+                ],
+                [
+                    os.path.join("docs", "blog", "post"),
+                    os.path.join("docs", "images", "a.png"),
+                ],
+                [os.path.join("docs", "blog", "post", "index.html")],
+            ],
+        )
+
+    def test_schedule_rejects_bad_plans(self):
+        with self.assertRaisesRegex(ValueError, "unplanned"):
+            schedule([Task("page", "a.md", "docs/a.html", ["docs"])])
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            schedule(
+                [
+                    Task("mkdir", None, "a", ["b"]),
+                    Task("mkdir", None, "b", ["a"]),
+                ]
+            )
+        with self.assertRaisesRegex(ValueError, "conflicts"):
+            schedule([Task("mkdir", None, "a"), Task("asset", "x", "a")])
+
+    def test_describe_plan(self):
+        description = describe_plan(self.plan())
+        self.assertTrue(description.startswith("wave 1: 1 tasks\n  mkdir "))
+        self.assertTrue(description.endswith("8 tasks (4 mkdir, 2 asset, 2 page)"))
+
+    def test_run_plan_into_existing_tree(self):
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_plan(self.plan(), self.template, "/", jobs=2)
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<title>Home</title><div><h1 id="home">Home</h1><p>Hello</p></div>',
+            )
+        with open(os.path.join(self.docs, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png")
+
+    def test_run_plan_returns_page_records(self):
+        self.write(
+            os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)"
+        )
+        tasks = self.plan()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rendered = run_plan(tasks, self.template, "/", search=True)
+        pages, outputs = plan_pages(tasks, rendered, self.docs)
+        self.assertListEqual(
+            outputs,
+            [
+                os.path.join("images", "a.png"),
+                "index.css",
+                os.path.join("blog", "post", "index.html"),
+                "index.html",
+            ],
+        )
+        self.assertDictEqual(
+            pages["index.html"],
+            {
+                "title": "Home",
+                "references": [("link", "/blog/post")],
+                "headings": [(1, "Home", "home")],
+                "terms": {"home": [0], "post": [1]},
+            },
+        )
+
+    def test_generate_pages_recursive_into_existing_tree(self):
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, self.docs, "/")
+        self.assertTrue(
+            os.path.exists(os.path.join(self.docs, "blog", "post", "index.html"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
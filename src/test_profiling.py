@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import profiling
+from utils import markdown_to_html_node, render_block, render_page
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled_stage_is_noop(self):
+        with profiling.stage("read"), profiling.page("page.md"):
+            pass
+        self.assertIsNone(profiling.active)
+
+    def test_nested_stages_record_exclusive_time(self):
+        profiler = profiling.enable()
+        with profiler.profile_page("page.md"):
+            with profiling.stage("outer"):
+                with profiling.stage("inner"):
+                    time.sleep(0.02)
+        self.assertLess(profiler.stages["outer"][0], 0.01)
+        self.assertGreaterEqual(profiler.stages["inner"][0], 0.02)
+        self.assertEqual(profiler.stages["inner"][1], 1)
+        self.assertGreaterEqual(profiler.pages["page.md"]["seconds"], 0.02)
+        self.assertSetEqual(
+            set(profiler.pages["page.md"]["stages"]), {"outer", "inner"}
+        )
+
+    def test_record_after_page_adds_to_its_total(self):
+        profiler = profiling.enable()
+        with profiler.profile_page("page.md"):
+            pass
+        profiling.record("write", 0.5, "page.md")
+        self.assertGreaterEqual(profiler.pages["page.md"]["seconds"], 0.5)
+        self.assertDictEqual(profiler.pages["page.md"]["stages"], {"write": 0.5})
+        self.assertIn("write      page.md", profiler.summary())
+
+    def test_merge(self):
+        profiler = profiling.Profiler()
+        profiler.record("read", 1.0)
+        profiler.merge(
+            {
+                "stages": {"read": [2.0, 3], "write": [1.0, 1]},
+                "pages": {"a.md": {"seconds": 3.0, "stages": {"read": 2.0}}},
+            }
+        )
+        self.assertListEqual(profiler.stages["read"], [3.0, 4])
+        self.assertIn("a.md", profiler.summary())
+
+    def test_merge_counters(self):
+        profiler = profiling.Profiler()
+        profiler.count("block_hits", 2)
+        profiler.merge(
+            {
+                "stages": {},
+                "pages": {},
+                "counters": {"block_hits": 1, "block_misses": 1},
+            }
+        )
+        self.assertDictEqual(profiler.counters, {"block_hits": 3, "block_misses": 1})
+        self.assertIn("3 of 4 blocks reused (75.0% hit rate)", profiler.summary())
+
+    def test_block_memo_counters(self):
+        render_block.cache_clear()
+        profiler = profiling.enable()
+        markdown_to_html_node("# Title\n\nFooter")
+        markdown_to_html_node("# Other\n\nFooter")
+        self.assertDictEqual(profiler.counters, {"block_hits": 1, "block_misses": 3})
+
+    def test_render_page_stages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w") as f:
+                f.write("# Title\n\nSome **bold** text\n\n- a\n- b")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            render_block.cache_clear()
+            profiler = profiling.enable()
+            render_page(source, template, os.path.join(tmp, "index.html"), "/")
+            profiler.write_json(os.path.join(tmp, "profile.json"))
+            with open(os.path.join(tmp, "profile.json")) as f:
+                data = json.load(f)
+        for name in ["read", "blocks", "inline", "title", "load_template", "write"]:
+            self.assertIn(name, data["stages"])
+        self.assertEqual(data["stages"]["inline"][1], 4)
+        self.assertListEqual(list(data["pages"]), [source])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from references import (
+    ReferenceIndex,
+    output_names,
+    page_index,
+    page_url,
+    referring_pages,
+    resolve_target,
+)
+
+
+class TestResolveTarget(unittest.TestCase):
+    def test_site_relative(self):
+        self.assertEqual(resolve_target("index.html", "/blog/tom"), "blog/tom")
+        self.assertEqual(resolve_target("index.html", "/blog/tom/"), "blog/tom")
+        self.assertEqual(resolve_target("a/b.html", "/"), "")
+        self.assertEqual(
+            resolve_target("index.html", "/images/a%20b.png?v=2#top"),
+            "images/a b.png",
+        )
+
+    def test_page_relative(self):
+        self.assertEqual(
+            resolve_target("blog/tom/index.html", "../majesty/"), "blog/majesty"
+        )
+        self.assertEqual(resolve_target("blog/tom.html", "cat.png"), "blog/cat.png")
+
+    def test_off_site_and_self(self):
+        for url in ["https://example.com/", "mailto:a@b.c", "//cdn.test/x.js", "#top"]:
+            self.assertIsNone(resolve_target("index.html", url))
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html", "/site/"), "/site/")
+        self.assertEqual(page_url("blog/tom/index.html", "/"), "/blog/tom/")
+        self.assertEqual(page_url("contact.html", "/"), "/contact.html")
+
+    def test_output_names(self):
+        self.assertListEqual(output_names("index.html"), ["index.html", ""])
+        self.assertListEqual(
+            output_names("blog/tom/index.html"), ["blog/tom/index.html", "blog/tom"]
+        )
+        self.assertListEqual(output_names("contact.html"), ["contact.html", "contact"])
+        self.assertListEqual(output_names("images/a.png"), ["images/a.png"])
+
+
+class TestReferenceIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ReferenceIndex(
+            {
+                "index.html": [("link", "/blog/tom"), ("image", "/images/a.png")],
+                "blog/tom/index.html": [("link", "/"), ("link", "../gone/")],
+                "contact.html": [("link", "https://example.com")],
+            }
+        )
+        self.outputs = ["index.html", "blog/tom/index.html", "contact.html"]
+
+    def test_reverse(self):
+        self.assertDictEqual(
+            self.index.reverse(),
+            {
+                "blog/tom": ["index.html"],
+                "images/a.png": ["index.html"],
+                "": ["blog/tom/index.html"],
+                "blog/gone": ["blog/tom/index.html"],
+            },
+        )
+
+    def test_broken(self):
+        self.assertListEqual(
+            self.index.broken(self.outputs),
+            [
+                ("index.html", "image", "/images/a.png"),
+                ("blog/tom/index.html", "link", "../gone/"),
+            ],
+        )
+        self.assertListEqual(self.index.broken(self.outputs + ["images/a.png"])[1:], [])
+
+    def test_referrers(self):
+        self.assertSetEqual(
+            self.index.referrers(["blog/gone/index.html", "index.html"]),
+            {"blog/tom/index.html"},
+        )
+        self.assertSetEqual(self.index.referrers(["contact.html"]), set())
+
+    def test_referring_pages(self):
+        pages = {
+            "index.md": {"dest": "index.html", "references": [["link", "/contact"]]},
+            "contact.md": {"dest": "contact.html", "references": []},
+        }
+        self.assertSetEqual(referring_pages(pages, {"contact.html"}), {"index.md"})
+
+    def test_page_index(self):
+        index = page_index(
+            {"index.html": {"title": "Home", "references": [["image", "/b.png"]]}}
+        )
+        self.assertListEqual(
+            index.broken(["index.html"]), [("index.html", "image", "/b.png")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+
+from search import (
+    SearchIndex,
+    build_search_index,
+    decode_postings,
+    encode_postings,
+    shard_name,
+)
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, name):
+        with open(os.path.join(self.tmp.name, "search", name)) as f:
+            return json.load(f)
+
+    def test_postings_roundtrip(self):
+        postings = [(0, [3, 10, 12]), (4, [0]), (9, [7, 8])]
+        encoded = encode_postings(postings)
+        self.assertListEqual(encoded, [0, 3, 3, 7, 2, 4, 1, 0, 5, 2, 7, 1])
+        self.assertListEqual(decode_postings(encoded), postings)
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("tom"), "t")
+        self.assertEqual(shard_name("42"), "4")
+        self.assertEqual(shard_name("élan"), "_")
+
+    def test_write_shards(self):
+        index = build_search_index(
+            {
+                "index.html": {"title": "Home", "terms": {"tom": [1], "home": [0]}},
+                "blog/tom/index.html": {"title": "Tom", "terms": {"tom": [0, 4]}},
+            },
+            "/",
+        )
+        self.assertEqual(index.write(self.tmp.name), 3)
+        self.assertDictEqual(
+            self.read("index.json"),
+            {
+                "version": 1,
+                "pages": [["/blog/tom/", "Tom"], ["/", "Home"]],
+                "shards": ["h", "t"],
+            },
+        )
+        self.assertDictEqual(self.read("t.json"), {"tom": [0, 2, 0, 4, 1, 1, 1]})
+        self.assertDictEqual(self.read("h.json"), {"home": [1, 1, 0]})
+        self.assertEqual(index.write(self.tmp.name), 0)
+
+    def test_write_removes_stale_shards(self):
+        index = SearchIndex()
+        index.add("/", "Home", {"home": [0], "zebra": [1]})
+        index.write(self.tmp.name)
+        index = SearchIndex()
+        index.add("/", "Home", {"home": [0]})
+        index.write(self.tmp.name)
+        self.assertListEqual(
+            sorted(os.listdir(os.path.join(self.tmp.name, "search"))),
+            ["h.json", "index.json"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
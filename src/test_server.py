@@ -0,0 +1,154 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+from server import RELOAD_SCRIPT, DevSite, create_server
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(os.path.join(self.content, "blog", "post"))
+        self.write(
+            self.template, "<title>{{ Title }}</title><body>{{ Content }}</body>"
+        )
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(
+            os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)"
+        )
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.site = DevSite(
+            self.static, self.content, self.template, site_url="http://example.com"
+        )
+        self.server = create_server(self.site, port=0)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+        self.base = f"http://localhost:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def get(self, path):
+        with urllib.request.urlopen(self.base + path) as response:
+            return response.status, response.read().decode()
+
+    def test_resolve(self):
+        self.assertEqual(
+            self.site.resolve("/"), ("page", os.path.join(self.content, "index.md"))
+        )
+        self.assertEqual(self.site.resolve("/blog/post"), ("redirect", "/blog/post/"))
+        self.assertEqual(
+            self.site.resolve("/blog/post/index.html"),
+            ("page", os.path.join(self.content, "blog", "post", "index.md")),
+        )
+        self.assertEqual(
+            self.site.resolve("/index.css"),
+            ("static", os.path.join(self.static, "index.css")),
+        )
+        self.assertEqual(self.site.resolve("/../template.html"), (None, None))
+        self.assertEqual(self.site.resolve("/blog/"), (None, None))
+
+    def test_renders_page_with_reload_script(self):
+        status, body = self.get("/")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body,
+            '<title>Home</title><body><div><h1 id="home">Home</h1>'
+            '<p><a href="/blog/post">Post</a></p></div>'
+            + RELOAD_SCRIPT
+            + "</body>",
+        )
+
+    def test_follows_directory_redirect(self):
+        status, body = self.get("/blog/post")
+        self.assertEqual(status, 200)
+        self.assertIn('<h1 id="post">Post</h1>', body)
+
+    def test_cache_invalidated_by_source_change(self):
+        self.get("/")
+        self.get("/")
+        self.assertEqual((self.site.cache.hits, self.site.cache.misses), (1, 1))
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Changed home")
+        os.utime(path, ns=(0, 0))
+        self.assertIn('<h1 id="changed-home">Changed home</h1>', self.get("/")[1])
+
+    def test_static_and_missing(self):
+        self.assertEqual(self.get("/index.css"), (200, "body {}"))
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.get("/missing")
+        self.assertEqual(error.exception.code, 404)
+
+    def test_missing_file_skips_listings(self):
+        with mock.patch.object(DevSite, "listings", side_effect=AssertionError):
+            self.assertEqual(self.site.resolve("/favicon.ico"), (None, None))
+            self.assertEqual(self.site.resolve("/about/"), (None, None))
+
+    def test_listings_and_feeds(self):
+        self.write(
+            os.path.join(self.content, "blog", "post", "index.md"),
+            "---\ndate: 2024-01-02\ntags: [Old Forest]\n---\n# Post",
+        )
+        status, body = self.get("/blog/")
+        self.assertEqual(status, 200)
+        self.assertIn('<a href="/blog/post/">Post</a>', body)
+        self.assertIn(RELOAD_SCRIPT, body)
+        status, body = self.get("/tags/old-forest")
+        self.assertIn("<h1>Posts tagged Old Forest</h1>", body)
+        with urllib.request.urlopen(self.base + "/rss.xml") as response:
+            self.assertEqual(response.headers["Content-Type"], "application/rss+xml")
+            self.assertIn(
+                "<link>http://example.com/blog/post/</link>", response.read().decode()
+            )
+
+    def test_render_error(self):
+        self.write(os.path.join(self.content, "index.md"), "no title")
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.get("/")
+        self.assertEqual(error.exception.code, 500)
+
+    def test_render_error_is_escaped(self):
+        self.write(os.path.join(self.content, "index.md"), "---\n<script>x\n---\n# Home")
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.get("/")
+        body = error.exception.read().decode()
+        self.assertNotIn("<script>x", body)
+        self.assertIn("&lt;script&gt;", body)
+
+    def head(self, path):
+        request = urllib.request.Request(self.base + path, method="HEAD")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers, response.read()
+
+    def test_head(self):
+        status, headers, body = self.head("/")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(headers["Content-Length"], str(len(self.get("/")[1])))
+        status, headers, body = self.head("/__livereload")
+        self.assertEqual((status, body), (200, b""))
+        self.assertEqual(headers["Content-Type"], "text/event-stream")
+
+    def test_live_reload_event(self):
+        with urllib.request.urlopen(self.base + "/__livereload", timeout=5) as events:
+            self.site.reloader.notify()
+            self.assertEqual(events.readline(), b"data: reload\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# `import main` may take this many times as long as the argparse it always
+# needs, measured in the same process so a slow or busy machine scales both;
+# it is about 1.6 with compiled bytecode, and a heavy dependency pushes it past
+IMPORT_BUDGET_RATIO = 2.5
+IMPORT_RUNS = 5
+DEFERRED_MODULES = [
+    "asyncio",
+    "concurrent.futures",
+    "ctypes",
+    "email.utils",
+    "hashlib",
+    "http.server",
+    "json",
+    "mmap",
+    "multiprocessing",
+    "pipeline",
+    "server",
+    "shutil",
+    "urllib.request",
+    "watch",
+    "xml.sax.saxutils",
+]
+
+
+def import_times(module, env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdecimal():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_time_budget(self):
+        with tempfile.TemporaryDirectory() as cache:
+            # Startup is measured with bytecode compiled, as an installed
+            # copy runs, and the fastest of a few runs ignores the noise
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+            env.pop("PYTHONDONTWRITEBYTECODE", None)
+            import_times("main", env)
+            runs = [import_times("main", env) for _ in range(IMPORT_RUNS)]
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, runs[0])
+        ratio = min(times["main"] / times["argparse"] for times in runs)
+        self.assertLess(ratio, IMPORT_BUDGET_RATIO)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import compile_template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_template_slots(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertTupleEqual(
+            template.parts, ("<title>", "Title", "</title>", "Content", "")
+        )
+        self.assertSetEqual(template.slots, {"Title", "Content"})
+
+    def test_render(self):
+        template = compile_template("<title>{{ Title }}</title><p>{{ Content }}</p>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="there"),
+            "<title>Hi</title><p>there</p>",
+        )
+
+    def test_render_unknown_slot(self):
+        template = compile_template("{{ Title }} {{ Other }}")
+        self.assertEqual(template.render(Title="Hi"), "Hi {{ Other }}")
+
+    def test_write_streams_nodes(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        buffer = io.StringIO()
+        template.write(
+            buffer, Title="Hi", Content=ParentNode("p", [LeafNode("b", "there")])
+        )
+        self.assertEqual(buffer.getvalue(), "<title>Hi</title><p><b>there</b></p>")
+
+    def test_basepath_only_applied_to_template(self):
+        template = compile_template(
+            '<link href="/index.css" /><script src="/app.js"></script>{{ Content }}',
+            "/site/",
+        )
+        self.assertEqual(
+            template.render(Content='<code>href="/raw"</code>'),
+            '<link href="/site/index.css" /><script src="/site/app.js"></script>'
+            '<code>href="/raw"</code>',
+        )
+
+    def test_load_template_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            template = load_template(path, "/")
+            self.assertIs(load_template(path, "/"), template)
+            self.assertIsNot(load_template(path, "/site/"), template)
+            with open(path, "w") as f:
+                f.write("<h2>{{ Title }}</h2>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(load_template(path, "/").render(Title="x"), "<h2>x</h2>")
+
+
+if __name__ == "__main__":
+    unittest.main()
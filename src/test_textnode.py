@@ -23,6 +23,12 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is another text node", TextType.BOLD)
         self.assertNotEqual(node, node2)
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
     def test_text_to_html_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = node.to_html_node()
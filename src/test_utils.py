@@ -1,13 +1,28 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 
+from blocks import BlockType
 from textnode import TextNode, TextType
 from utils import (
+    PageData,
+    block_cache_stats,
     extract_markdown_images,
     extract_markdown_links,
     markdown_to_html_node,
+    open_source,
+    page_metadata,
+    parse_tags,
+    read_title,
+    render_block,
+    render_page,
+    slugify,
+    toc_html,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
+    split_inline_delimiters,
     text_to_textnodes,
 )
 
@@ -319,6 +334,51 @@ class TestNodeUtils(unittest.TestCase):
             ],
         )
 
+    def test_text_to_textnodes_matches_split_pipeline(self):
+        samples = [
+            "Plain text",
+            "",
+            "a****b and `` empty spans",
+            "**bold with _two_ underscores** and _italic `code` inside_",
+            "![img](/a.png) then [link](/b) and **[bold link](/c)**",
+            "[a ![b](c) d](e) overlapping references",
+            "`code with [link](url)` and _![alt](src)_",
+        ]
+        for text in samples:
+            legacy = split_nodes_link(
+                split_nodes_image(
+                    split_nodes_delimiter(
+                        split_nodes_delimiter(
+                            split_nodes_delimiter(
+                                [TextNode(text, TextType.TEXT)], "**", TextType.BOLD
+                            ),
+                            "_",
+                            TextType.ITALIC,
+                        ),
+                        "`",
+                        TextType.CODE,
+                    )
+                )
+            )
+            self.assertListEqual(text_to_textnodes(text), legacy)
+
+    def test_text_to_textnodes_invalid_delimiters(self):
+        for text in ["**a _b** c", "_a **b** c_", "`a _b` c_", "**a", "_a `b_"]:
+            with self.assertRaises(SyntaxError):
+                text_to_textnodes(text)
+
+    def test_text_to_textnodes_many_spans(self):
+        text = " ".join(f"**b{i}** _i{i}_ [l{i}](/p/{i})" for i in range(5000))
+        new_nodes = text_to_textnodes(text)
+        self.assertEqual(len(new_nodes), 6 * 5000 - 1)
+        self.assertEqual(new_nodes[-1], TextNode("l4999", TextType.LINK, "/p/4999"))
+
+    def test_split_inline_delimiters_empty_spans(self):
+        self.assertListEqual(
+            split_inline_delimiters("a****b"),
+            [TextNode("a", TextType.TEXT), TextNode("b", TextType.TEXT)],
+        )
+
     def test_markdown_to_html_node_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -336,6 +396,22 @@ This is another paragraph with _italic_ text and `code` here
             "<div><p>This is <b>bolded</b> paragraph text in a p tag here</p><p>This is another paragraph with <i>italic</i> text and <code>code</code> here</p></div>",
         )
 
+    def test_markdown_to_html_node_basepath(self):
+        md = """
+[Home](/) and ![image](/images/a.png) and [external](https://boot.dev)
+
+```
+<a href="/raw">left alone</a>
+```
+        """
+
+        node = markdown_to_html_node(md, "/site/")
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/">Home</a> and <img src="/site/images/a.png" alt="image"></img> and <a href="https://boot.dev">external</a></p><pre><code><a href="/raw">left alone</a>\n</code></pre></div>',
+        )
+
     def test_markdown_to_html_node_headings(self):
         md = """
 # This is a **headings** test
@@ -351,7 +427,7 @@ This is another paragraph with _italic_ text and `code` here
         html = node.to_html()
         self.assertEqual(
             html,
-            "<div><h1>This is a <b>headings</b> test</h1><h2>With <i>multiple</i> <code>headings</code></h2><p>###Improper syntax</p><p>####### And a non heading</p></div>",
+            '<div><h1 id="this-is-a-headings-test">This is a <b>headings</b> test</h1><h2 id="with-multiple-headings">With <i>multiple</i> <code>headings</code></h2><p>###Improper syntax</p><p>####### And a non heading</p></div>',
         )
 
     def test_markdown_to_html_node_headings_no_space(self):
@@ -440,3 +516,311 @@ with quotes misused
             html,
             "<div><ol><li>This <b>is</b></li><li>an <code>ordered</code></li><li>list</li></ol><p>1. with multiple lines 2.</p><p>3. and improper</p><p>1.code</p></div>",
         )
+
+    def test_markdown_to_html_node_reuses_repeated_blocks(self):
+        render_block.cache_clear()
+        footer = "Shared **footer** with [a link](/about)"
+        first = markdown_to_html_node(f"# One\n\n{footer}")
+        second = markdown_to_html_node(f"# Two\n\n{footer}")
+        self.assertIs(first.children[1], second.children[1])
+        stats = block_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["hit_rate"], 0.25)
+        self.assertEqual(
+            second.to_html(),
+            '<div><h1 id="two">Two</h1><p>Shared <b>footer</b> with <a href="/about">a link</a></p></div>',
+        )
+
+    def test_markdown_to_html_node_memo_keyed_by_basepath(self):
+        render_block.cache_clear()
+        md = "[Home](/)"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '<div><p><a href="/">Home</a></p></div>',
+        )
+        self.assertEqual(
+            markdown_to_html_node(md, "/site/").to_html(),
+            '<div><p><a href="/site/">Home</a></p></div>',
+        )
+        self.assertEqual(block_cache_stats()["hits"], 0)
+
+    def test_markdown_to_html_node_collects_references(self):
+        render_block.cache_clear()
+        md = "[Home](/) and ![cat](/images/cat.png)\n\n- [Tom](/blog/tom) and `cat`"
+        for _ in range(2):
+            data = PageData(search=True)
+            markdown_to_html_node(md, "/site/", data)
+            self.assertListEqual(
+                data.references,
+                [
+                    ("link", "/"),
+                    ("image", "/images/cat.png"),
+                    ("link", "/blog/tom"),
+                ],
+            )
+            self.assertDictEqual(
+                data.terms,
+                {"home": [0], "and": [1, 4], "cat": [2, 5], "tom": [3]},
+            )
+            self.assertEqual(data.words, 6)
+        self.assertEqual(block_cache_stats()["hits"], 2)
+
+    def test_markdown_to_html_node_words_span_markup(self):
+        data = PageData(search=True)
+        markdown_to_html_node("un**believ**able _tom_\n\n`cat`s", "/", data)
+        self.assertDictEqual(data.terms, {"unbelievable": [0], "tom": [1], "cats": [2]})
+
+    def test_markdown_to_html_node_collects_headings(self):
+        render_block.cache_clear()
+        md = "## Intro\n\n#not a heading\n\n# Title\n\n### Part **1**\n\n# Later"
+        for _ in range(2):
+            data = PageData()
+            markdown_to_html_node(md, "/", data)
+            self.assertListEqual(
+                data.headings,
+                [
+                    (2, "Intro", "intro"),
+                    (1, "Title", "title"),
+                    (3, "Part 1", "part-1"),
+                    (1, "Later", "later"),
+                ],
+            )
+            self.assertEqual(data.title(), "Title")
+        self.assertEqual(block_cache_stats()["hits"], 5)
+
+
+class TestHeadingAnchors(unittest.TestCase):
+    def test_ids_never_collide(self):
+        render_block.cache_clear()
+        html = markdown_to_html_node(
+            "# Intro\n\n## Intro-1\n\n# Intro\n\n# Intro\n\n## !!!\n\n## !!!"
+        ).to_html()
+        self.assertEqual(
+            html,
+            '<div><h1 id="intro">Intro</h1><h2 id="intro-1">Intro-1</h2>'
+            '<h1 id="intro-2">Intro</h1><h1 id="intro-3">Intro</h1>'
+            '<h2 id="section">!!!</h2><h2 id="section-1">!!!</h2></div>',
+        )
+        # The memoized heading is shared, not given the page's id
+        self.assertIsNone(render_block(BlockType.HEADING, ("# Intro",))[0].props)
+
+    def test_ids_restart_per_page(self):
+        for _ in range(2):
+            self.assertEqual(
+                markdown_to_html_node("# Intro").to_html(),
+                '<div><h1 id="intro">Intro</h1></div>',
+            )
+
+    def test_toc_html(self):
+        self.assertEqual(toc_html([]), "")
+        data = PageData()
+        markdown_to_html_node(
+            "## Start\n\n# Title\n\n## A _b_\n\n### C\n\n## D\n\n# End", "/", data
+        )
+        self.assertEqual(
+            toc_html(data.headings),
+            '<nav><ul><li><a href="#start">Start</a></li>'
+            '<li><a href="#title">Title</a><ul><li><a href="#a-b">A b</a>'
+            '<ul><li><a href="#c">C</a></li></ul></li>'
+            '<li><a href="#d">D</a></li></ul></li>'
+            '<li><a href="#end">End</a></li></ul></nav>',
+        )
+
+    def test_toc_slot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "index.html")
+            with open(source, "w") as f:
+                f.write("# Title\n\n## Part")
+            with open(template, "w") as f:
+                f.write("{{ TOC }}{{ Content }}")
+            render_page(source, template, dest, "/")
+            with open(dest) as f:
+                self.assertEqual(
+                    f.read(),
+                    '<nav><ul><li><a href="#title">Title</a><ul><li>'
+                    '<a href="#part">Part</a></li></ul></li></ul></nav>'
+                    '<div><h1 id="title">Title</h1><h2 id="part">Part</h2></div>',
+                )
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_front_matter_is_metadata(self):
+        data = PageData()
+        html = markdown_to_html_node(
+            "---\ntitle: 'Tom'\ndate: 2024-03-01\ntags: [Tolkien, \"Old Forest\"]\n---"
+            "\n\n# Heading\n\n---",
+            "/",
+            data,
+        ).to_html()
+        self.assertEqual(html, '<div><h1 id="heading">Heading</h1><p>---</p></div>')
+        self.assertDictEqual(
+            data.metadata,
+            {"title": "Tom", "date": "2024-03-01", "tags": ["Tolkien", "Old Forest"]},
+        )
+        self.assertDictEqual(
+            data.record(),
+            {
+                "title": "Tom",
+                "date": "2024-03-01",
+                "tags": ["Tolkien", "Old Forest"],
+                "references": [],
+                "headings": [(1, "Heading", "heading")],
+            },
+        )
+
+    def test_front_matter_without_blank_line(self):
+        markdown = "---\ntitle: Hi\ntags:\n  - a\n  - 'b c'\n---\n# Heading\n\nText"
+        data = PageData()
+        html = markdown_to_html_node(markdown, "/", data).to_html()
+        self.assertEqual(html, '<div><h1 id="heading">Heading</h1><p>Text</p></div>')
+        self.assertDictEqual(data.metadata, {"title": "Hi", "tags": ["a", "b c"]})
+        data = PageData()
+        markdown_to_html_node(markdown.encode(), "/", data)
+        self.assertDictEqual(data.metadata, {"title": "Hi", "tags": ["a", "b c"]})
+
+    def test_front_matter_list_must_be_tags(self):
+        with self.assertRaisesRegex(SyntaxError, "title must be a single value"):
+            markdown_to_html_node("---\ntitle:\n- a\n---\n# Heading", "/", PageData())
+
+    def test_front_matter_only_at_start(self):
+        data = PageData()
+        html = markdown_to_html_node("# Heading\n\n---\ndate: x\n---", "/", data)
+        self.assertEqual(
+            html.to_html(),
+            '<div><h1 id="heading">Heading</h1><p>--- date: x ---</p></div>',
+        )
+        self.assertDictEqual(data.metadata, {})
+
+    def test_invalid_date(self):
+        with self.assertRaises(SyntaxError):
+            page_metadata({"date": "March 1st"})
+
+    def test_parse_tags_and_slugify(self):
+        self.assertListEqual(parse_tags("a, b ,, 'c d'"), ["a", "b", "c d"])
+        self.assertListEqual(parse_tags("[]"), [])
+        self.assertEqual(slugify("Old Forest: Part 2!"), "old-forest-part-2")
+
+
+class TestStreamPage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.source, "w") as f:
+            f.write(
+                "Intro\n\n# Big **log**\n\n## 1.0\n\n- [fixed](/issues/1)\n- `x`"
+                "\n\n\n```\ncode\nblock\n```\n\n> quoted\n"
+            )
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, name, threshold, read_size=1 << 16):
+        dest = os.path.join(self.tmp.name, name)
+        with mock.patch.multiple(
+            "utils", STREAM_THRESHOLD=threshold, READ_SIZE=read_size
+        ):
+            render_page(self.source, self.template, dest, "/site/")
+        with open(dest, "r") as f:
+            return f.read()
+
+    def test_read_title(self):
+        self.assertEqual(read_title(self.source), "Big **log**")
+        with open(self.source, "w") as f:
+            f.write("---\ntitle: From front matter\n---\n# Heading")
+        self.assertEqual(read_title(self.source), "From front matter")
+
+    def test_streamed_page_records_front_matter(self):
+        with open(self.source, "w") as f:
+            f.write("---\ndate: 2024-01-02\n---\n# Post\n\n[a](/a)")
+        dest = os.path.join(self.tmp.name, "streamed.html")
+        with mock.patch("utils.STREAM_THRESHOLD", 0):
+            page = render_page(self.source, self.template, dest, "/")
+        self.assertDictEqual(
+            page,
+            {
+                "title": "Post",
+                "date": "2024-01-02",
+                "references": [("link", "/a")],
+                "headings": [(1, "Post", "post")],
+            },
+        )
+
+    def test_streamed_page_matches_whole_page(self):
+        whole = self.render("whole.html", 1 << 20)
+        streamed = self.render("streamed.html", 0, 3)
+        self.assertEqual(streamed, whole)
+
+    def test_streamed_page_toc_matches_whole_page(self):
+        for template in ["{{ TOC }}{{ Content }}", "{{ Content }}{{ TOC }}"]:
+            with open(self.template, "w") as f:
+                f.write(template)
+            whole = self.render("whole.html", 1 << 20)
+            self.assertIn('<nav><ul><li><a href="#big-log">', whole)
+            self.assertEqual(self.render("streamed.html", 0, 3), whole)
+
+    def test_streamed_page_skips_block_memo(self):
+        render_block.cache_clear()
+        self.render("streamed.html", 0)
+        self.assertEqual(render_block.cache_info().currsize, 0)
+
+    def test_streamed_page_does_not_read_whole_file(self):
+        with mock.patch(
+            "utils.markdown_to_html_node", side_effect=AssertionError("read whole")
+        ):
+            self.render("streamed.html", 0)
+
+
+class TestMappedSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.source, "wb") as f:
+            f.write(data)
+
+    def parse(self, markdown):
+        data = PageData()
+        html = markdown_to_html_node(markdown, "/", data).to_html()
+        return data.title(), html
+
+    def test_mapped_source_parses_like_text(self):
+        self.write("intro\n\n# Títle **x**\n\n- [a](/a)\n- b\n".encode())
+        with open_source(self.source) as text:
+            expected = self.parse(text)
+        with open_source(self.source, use_mmap=True) as buffer:
+            self.assertNotIsInstance(buffer, str)
+            self.assertEqual(self.parse(buffer), expected)
+
+    def test_mapped_source_strips_front_matter(self):
+        self.write(b"---\ntitle: Mapped\ntags: [a]\n---\n\n# Heading\n")
+        with open_source(self.source, use_mmap=True) as buffer:
+            data = PageData()
+            html = markdown_to_html_node(buffer, "/", data).to_html()
+        self.assertEqual(html, '<div><h1 id="heading">Heading</h1></div>')
+        self.assertDictEqual(data.metadata, {"title": "Mapped", "tags": ["a"]})
+
+    def test_mapped_title_on_first_and_last_block(self):
+        self.assertEqual(self.parse(b"# First")[0], "First")
+        self.assertEqual(self.parse(b"text\n#no\n\n## Sub\n\n# Last")[0], "Last")
+        with self.assertRaisesRegex(Exception, "Title not found"):
+            self.parse(b"text\n#no")
+
+    def test_carriage_returns_fall_back_to_text(self):
+        self.write(b"# Title\r\n\r\nBody\r\n")
+        with open_source(self.source, use_mmap=True) as markdown:
+            self.assertEqual(markdown, "# Title\n\nBody\n")
+
+    def test_empty_file_falls_back_to_text(self):
+        self.write(b"")
+        with open_source(self.source, use_mmap=True) as markdown:
+            self.assertEqual(markdown, "")
@@ -0,0 +1,187 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from watch import InotifyWatcher, PollingWatcher, SiteWatcher
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "content")
+        os.makedirs(self.root)
+        self.path = os.path.join(self.root, "index.md")
+        with open(self.path, "w") as f:
+            f.write("# Home")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_watcher(self, watcher):
+        try:
+            self.assertSetEqual(watcher.poll(0), set())
+            with open(self.path, "a") as f:
+                f.write("\n\nMore")
+            self.assertIn(self.path, watcher.poll(1))
+            os.makedirs(os.path.join(self.root, "blog"))
+            new_path = os.path.join(self.root, "blog", "post.md")
+            with open(new_path, "w") as f:
+                f.write("# Post")
+            self.assertIn(new_path, watcher.poll(1) | watcher.poll(0.1))
+            os.remove(self.path)
+            self.assertIn(self.path, watcher.poll(1))
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.root], interval=0.01))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.root])
+        except (OSError, AttributeError, TypeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.static)
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+        self.site = SiteWatcher(
+            self.static, self.content, self.template, self.docs, "/"
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.site.build()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def handle(self, *paths):
+        with contextlib.redirect_stdout(io.StringIO()):
+            updated = self.site.handle(paths)
+        return sorted(os.path.relpath(path, self.docs) for path in updated)
+
+    def test_source_change_renders_one_page(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home\n\nUpdated")
+        self.assertListEqual(self.handle(path), ["index.html"])
+        self.assertListEqual(self.handle(path), [])
+
+    def test_search_index_follows_source_change(self):
+        self.site = SiteWatcher(
+            self.static, self.content, self.template, self.docs, "/", search=True
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.site.build()
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "# Home\n\nUpdated")
+        self.assertListEqual(self.handle(path), ["index.html", "search"])
+        shards = os.listdir(os.path.join(self.docs, "search"))
+        with open(os.path.join(self.docs, "search", max(shards))) as f:
+            self.assertIn('"updated"', f.read())
+        self.assertListEqual(self.handle(path), [])
+
+    def test_static_file_does_not_replace_page(self):
+        path = os.path.join(self.static, "index.html")
+        self.write(path, "static home")
+        self.assertListEqual(self.handle(path), [])
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn("<title>Home</title>", f.read())
+
+    def test_template_change_renders_all_pages(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertListEqual(
+            self.handle(self.template),
+            [os.path.join("blog", "post.html"), "index.html"],
+        )
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(
+                f.read(), '<h1>Home</h1><div><h1 id="home">Home</h1></div>'
+            )
+
+    def test_template_change_with_removed_page(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.assertListEqual(
+            self.handle(self.template, os.path.join(self.content, "blog", "post.md")),
+            [os.path.join("blog", "post.html"), "index.html"],
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "post.html")))
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertEqual(
+                f.read(), '<h1>Home</h1><div><h1 id="home">Home</h1></div>'
+            )
+
+    def test_template_is_recorded_after_failed_page(self):
+        index = os.path.join(self.content, "index.md")
+        self.write(index, "no title")
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertListEqual(
+            self.handle(self.template, index), [os.path.join("blog", "post.html")]
+        )
+        self.write(index, "# Home")
+        self.assertListEqual(
+            self.handle(self.template, index),
+            [os.path.join("blog", "post.html"), "index.html"],
+        )
+        self.assertListEqual(self.handle(self.template), [])
+
+    def test_removed_directory_removes_outputs(self):
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        self.assertListEqual(
+            self.handle(os.path.join(self.content, "blog")),
+            [os.path.join("blog", "post.html")],
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_new_directory_renders_pages(self):
+        os.makedirs(os.path.join(self.content, "about", "team"))
+        self.write(os.path.join(self.content, "about", "team", "index.md"), "# Team")
+        self.assertListEqual(
+            self.handle(os.path.join(self.content, "about")),
+            [os.path.join("about", "team", "index.html")],
+        )
+
+    def test_new_page_renders_referring_pages(self):
+        index = os.path.join(self.content, "index.md")
+        self.write(index, "# Home\n\n[About](/about)")
+        self.assertListEqual(self.handle(index), ["index.html"])
+        about = os.path.join(self.content, "about.md")
+        self.write(about, "# About")
+        self.assertListEqual(self.handle(about), ["about.html", "index.html"])
+
+    def test_failed_page_is_reported_and_retried(self):
+        path = os.path.join(self.content, "index.md")
+        self.write(path, "no title")
+        self.assertListEqual(self.handle(path), [])
+        self.write(path, "# Fixed")
+        self.assertListEqual(self.handle(path), ["index.html"])
+
+    def test_static_changes(self):
+        path = os.path.join(self.static, "index.css")
+        self.write(path, "body { margin: 0 }")
+        self.assertListEqual(self.handle(path), ["index.css"])
+        os.remove(path)
+        self.assertListEqual(self.handle(path), ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.css")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,19 @@ from enum import Enum
 
 from htmlnode import HTMLNode, LeafNode
 
-TextType = Enum("TextType", ["TEXT", "BOLD", "ITALIC", "CODE", "LINK", "IMAGE"])
+
+class TextType(Enum):
+    TEXT = 1
+    BOLD = 2
+    ITALIC = 3
+    CODE = 4
+    LINK = 5
+    IMAGE = 6
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None) -> None:
         self.text = text
         self.text_type = text_type
@@ -1,11 +1,36 @@
+import contextlib
+import functools
+import itertools
 import os
-import re
-import shutil
 
-from blocks import BlockType, block_to_block_type, markdown_to_blocks
-from htmlnode import HTMLNode, ParentNode
+import profiling
+from blocks import (
+    BlockType,
+    iter_blocks,
+    front_matter_end,
+    parse_front_matter,
+    scan_blocks,
+    scan_mapped_blocks,
+)
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from output import atomic_output
+from patterns import (
+    IMAGE_PATTERN,
+    IMAGE_SPLIT,
+    INLINE_DELIMITERS,
+    LINK_PATTERN,
+    LINK_SPLIT,
+    WORD_PATTERN,
+)
+from template import load_template
 from textnode import TextNode, TextType
 
+BLOCK_CACHE_SIZE = 1024
+READ_SIZE = 1 << 16
+# Pages larger than this are parsed and written block by block instead of
+# being read and rendered whole
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type) -> list:
     new_nodes = []
@@ -41,18 +66,18 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type) -> list:
 
 
 def extract_markdown_images(text) -> list:
-    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text) -> list:
-    return re.findall(r"(?<!!)\[(.*?)\]\((.*?)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 def split_nodes_image(old_nodes) -> list:
     new_nodes = []
     for node in old_nodes:
         images = extract_markdown_images(node.text)
-        split_nodes = re.split(r"!\[.*?\]\(.*?\)", node.text, maxsplit=1)
+        split_nodes = IMAGE_SPLIT.split(node.text, maxsplit=1)
         if len(split_nodes) == 0 or len(images) == 0:
             new_nodes.append(node)
             continue
@@ -84,7 +109,7 @@ def split_nodes_link(old_nodes) -> list:
     new_nodes = []
     for node in old_nodes:
         links = extract_markdown_links(node.text)
-        split_nodes = re.split(r"(?<!!)\[.*?\]\(.*?\)", node.text, maxsplit=1)
+        split_nodes = LINK_SPLIT.split(node.text, maxsplit=1)
         if len(split_nodes) == 0 or len(links) == 0:
             new_nodes.append(node)
             continue
@@ -112,126 +137,428 @@ def split_nodes_link(old_nodes) -> list:
         return new_nodes
 
 
+def split_inline_delimiters(text) -> list:
+    # Single left-to-right scan with the same pairing rules as chaining
+    # split_nodes_delimiter for "**", "_" and "`" in that order
+    if INLINE_DELIMITERS.search(text) is None:
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    bold = italic = code = False
+    start = 0
+    counts = {"_": 0, "`": 0}
+    for match in INLINE_DELIMITERS.finditer(text):
+        delimiter = match.group()
+        if bold and delimiter != "**":
+            counts[delimiter] += 1
+            continue
+        if italic and delimiter == "`":
+            counts[delimiter] += 1
+            continue
+        segment = text[start : match.start()]
+        start = match.end()
+        if delimiter == "**":
+            if italic or code:
+                break
+            if bold and (counts["_"] == 1 or counts["`"] == 1):
+                break
+            text_type = TextType.BOLD if bold else TextType.TEXT
+            bold = not bold
+        elif delimiter == "_":
+            if code:
+                break
+            if italic and counts["`"] == 1:
+                break
+            text_type = TextType.ITALIC if italic else TextType.TEXT
+            italic = not italic
+        else:
+            text_type = TextType.CODE if code else TextType.TEXT
+            code = not code
+        counts["_"] = counts["`"] = 0
+        if segment != "":
+            nodes.append(TextNode(segment, text_type))
+    else:
+        if not (bold or italic or code):
+            if start < len(text):
+                nodes.append(TextNode(text[start:], TextType.TEXT))
+            return nodes
+    raise SyntaxError("Invalid Markdown syntax: Improper use of inline markdown")
+
+
+def split_inline_references(node, pattern, text_type, new_nodes) -> None:
+    text = node.text
+    if "](" not in text:
+        new_nodes.append(node)
+        return
+    start = 0
+    for match in pattern.finditer(text):
+        label, url = match.groups()
+        if text_type is TextType.IMAGE and url == "":
+            raise SyntaxError("Invalid Markdown syntax: Images must have an URL")
+        if text_type is TextType.LINK and (label == "" or url == ""):
+            raise SyntaxError("Invalid Markdown syntax: Links must have text and URL")
+        if match.start() > start:
+            new_nodes.append(TextNode(text[start : match.start()], TextType.TEXT))
+        new_nodes.append(TextNode(label, text_type, url))
+        start = match.end()
+    if start == 0:
+        new_nodes.append(node)
+    elif start < len(text):
+        new_nodes.append(TextNode(text[start:], TextType.TEXT))
+
+
 def text_to_textnodes(text) -> list:
-    return split_nodes_link(
-        split_nodes_image(
-            split_nodes_delimiter(
-                split_nodes_delimiter(
-                    split_nodes_delimiter(
-                        [TextNode(text, TextType.TEXT)], "**", TextType.BOLD
-                    ),
-                    "_",
-                    TextType.ITALIC,
-                ),
-                "`",
-                TextType.CODE,
-            )
+    image_nodes = []
+    for node in split_inline_delimiters(text):
+        split_inline_references(node, IMAGE_PATTERN, TextType.IMAGE, image_nodes)
+    new_nodes = []
+    for node in image_nodes:
+        split_inline_references(node, LINK_PATTERN, TextType.LINK, new_nodes)
+    return new_nodes
+
+
+def slugify(text) -> str:
+    return "-".join(WORD_PATTERN.findall(text.lower()))
+
+
+def parse_tags(value) -> list:
+    if value.startswith("[") and value.endswith("]"):
+        value = value[1:-1]
+    tags = (tag.strip().strip("\"'") for tag in value.split(","))
+    return [tag for tag in tags if tag != ""]
+
+
+def page_metadata(front_matter) -> dict:
+    metadata = {}
+    for key in ("title", "date"):
+        if isinstance(front_matter.get(key), list):
+            raise SyntaxError(f"Front matter {key} must be a single value")
+    if front_matter.get("title"):
+        metadata["title"] = front_matter["title"].strip("\"'")
+    if front_matter.get("date"):
+        import datetime
+
+        try:
+            date = datetime.date.fromisoformat(front_matter["date"].strip("\"'"))
+        except ValueError:
+            raise SyntaxError(f"Invalid front matter date: {front_matter['date']!r}")
+        metadata["date"] = date.isoformat()
+    tags = front_matter.get("tags")
+    if isinstance(tags, list):
+        metadata["tags"] = [tag.strip("\"'") for tag in tags if tag.strip("\"'")]
+    elif tags:
+        metadata["tags"] = parse_tags(tags)
+    return metadata
+
+
+# What parsing finds besides the HTML: references, metadata, headings, text
+class PageData:
+    def __init__(self, search=False) -> None:
+        self.references = []
+        self.metadata = {}
+        self.headings = []
+        self.heading_title = None
+        self.anchors = set()
+        self.text = []
+        self.terms = {} if search else None
+        self.words = 0
+
+    def add_text(self, text) -> None:
+        self.text.append(text)
+
+    def merge(self, other) -> None:
+        self.references.extend(other.references)
+        for level, text, slug in other.headings:
+            self.headings.append((level, text, self.anchor(slug)))
+        if self.heading_title is None:
+            self.heading_title = other.heading_title
+        if self.terms is None:
+            return
+        for word in WORD_PATTERN.findall(" ".join(other.text).lower()):
+            self.terms.setdefault(word, []).append(self.words)
+            self.words += 1
+
+    def anchor(self, slug) -> str:
+        # Merged headings get ids no earlier heading on the page has
+        slug = slug or "section"
+        anchor = slug
+        suffix = 0
+        while anchor in self.anchors:
+            suffix += 1
+            anchor = f"{slug}-{suffix}"
+        self.anchors.add(anchor)
+        return anchor
+
+    def title(self) -> str:
+        # The front matter title, or else the first "# " heading
+        title = self.metadata.get("title") or self.heading_title
+        if title is None:
+            raise Exception("Title not found")
+        return title
+
+    def record(self) -> dict:
+        record = dict(
+            self.metadata,
+            title=self.title(),
+            references=self.references,
+            headings=self.headings,
         )
-    )
+        if self.terms is not None:
+            record["terms"] = self.terms
+        return record
 
 
-def text_to_children(text) -> list:
+def text_to_children(text, basepath="/", data=None) -> list:
     children = []
-    for node in text_to_textnodes(text):
+    with profiling.stage("inline"):
+        textnodes = text_to_textnodes(text)
+    if data is not None:
+        # One chunk per run, so markup inside a word does not split it
+        data.add_text("".join(node.text for node in textnodes))
+    for node in textnodes:
+        if data is not None and node.url is not None:
+            data.references.append((node.text_type.name.lower(), node.url))
+        if basepath != "/" and node.url is not None and node.url.startswith("/"):
+            node.url = basepath + node.url[1:]
         children.append(node.to_html_node())
     return children
 
 
-def markdown_to_html_node(markdown) -> HTMLNode:
-    children = []
-    for block in markdown_to_blocks(markdown):
-        blocktext = block.replace("\n", " ")
-        match (block_to_block_type(block)):
-            case BlockType.PARAGRAPH:
-                children.append(ParentNode("p", text_to_children(blocktext)))
-            case BlockType.HEADING:
-                if len(block.split("\n")) > 1:
-                    raise SyntaxError(
-                        "Invalid Markdown syntax: headings should have new lines before and after them"
-                    )
-                children.append(
-                    ParentNode(
-                        f"h{blocktext.count('#', 0, 5)}",
-                        text_to_children(blocktext.replace("#", "").lstrip()),
-                    )
-                )
-            case BlockType.CODE:
-                children.append(
-                    ParentNode(
-                        "pre",
-                        [
-                            TextNode(
-                                block.replace("```", "").lstrip(), TextType.CODE
-                            ).to_html_node()
-                        ],
-                    )
+def block_to_html_node(block_type, lines, basepath="/", data=None) -> HTMLNode:
+    match (block_type):
+        case BlockType.PARAGRAPH:
+            return ParentNode("p", text_to_children(" ".join(lines), basepath, data))
+        case BlockType.HEADING:
+            if len(lines) > 1:
+                raise SyntaxError(
+                    "Invalid Markdown syntax: headings should have new lines before and after them"
                 )
-            case BlockType.QUOTE:
-                listitems = []
-                lines = block.split("\n")
-                quote_lines = []
-                for line in lines:
-                    match = re.match(r"^>(.*)$", line)
-                    if match:
-                        content = match.group(1).lstrip()
-                        quote_lines.append(content)
-                current_paragraph = []
-                for line in quote_lines:
-                    if line != "":
-                        current_paragraph.append(line)
-                    else:
-                        if current_paragraph != []:
-                            paragraph_text = " ".join(current_paragraph)
-                            listitems.append(
-                                ParentNode("p", text_to_children(paragraph_text))
-                            )
-                            current_paragraph = []
-                if current_paragraph != []:
-                    paragraph_text = " ".join(current_paragraph)
-                    listitems.append(ParentNode("p", text_to_children(paragraph_text)))
-                children.append(ParentNode("blockquote", listitems))
-            case BlockType.ULIST:
-                listitems = []
-                for listitem in block.split("\n"):
-                    listitems.append(
+            level = lines[0].count("#", 0, 5)
+            text = lines[0].replace("#", "").lstrip()
+            if data is None:
+                return ParentNode(f"h{level}", text_to_children(text, basepath))
+            children = text_to_children(text, basepath, data)
+            plain = data.text[-1]
+            data.headings.append((level, plain, slugify(plain)))
+            if lines[0].startswith("# "):
+                data.heading_title = text
+            return ParentNode(f"h{level}", children)
+        case BlockType.CODE:
+            code = "\n".join(lines).replace("```", "").lstrip()
+            if data is not None:
+                data.add_text(code)
+            return ParentNode("pre", [TextNode(code, TextType.CODE).to_html_node()])
+        case BlockType.QUOTE:
+            paragraphs = []
+            current_paragraph = []
+            for line in lines:
+                line = line[1:].lstrip()
+                if line != "":
+                    current_paragraph.append(line)
+                elif current_paragraph != []:
+                    paragraphs.append(
                         ParentNode(
-                            "li",
+                            "p",
                             text_to_children(
-                                re.findall(r"^-(.*)$", listitem, re.MULTILINE)[
-                                    0
-                                ].lstrip()
+                                " ".join(current_paragraph), basepath, data
                             ),
                         )
                     )
-                children.append(
+                    current_paragraph = []
+            if current_paragraph != []:
+                paragraphs.append(
                     ParentNode(
-                        "ul",
-                        listitems,
+                        "p",
+                        text_to_children(" ".join(current_paragraph), basepath, data),
                     )
                 )
-            case BlockType.OLIST:
-                listitems = []
-                for listitem in block.split("\n"):
-                    listitems.append(
-                        ParentNode(
-                            "li",
-                            text_to_children(
-                                re.findall(r"^\d+.(.+)$", listitem, re.MULTILINE)[
-                                    0
-                                ].lstrip()
-                            ),
-                        )
+            return ParentNode("blockquote", paragraphs)
+        case BlockType.ULIST:
+            listitems = []
+            for line in lines:
+                listitems.append(
+                    ParentNode(
+                        "li", text_to_children(line[1:].lstrip(), basepath, data)
                     )
-                children.append(
+                )
+            return ParentNode("ul", listitems)
+        case BlockType.OLIST:
+            listitems = []
+            for i, line in enumerate(lines):
+                listitems.append(
                     ParentNode(
-                        "ol",
-                        listitems,
+                        "li",
+                        text_to_children(
+                            line[len(str(i + 1)) + 1 :].lstrip(), basepath, data
+                        ),
                     )
                 )
+            return ParentNode("ol", listitems)
+
+
+# Rendered blocks are shared between every page repeating them, so nothing
+# may mutate an HTMLNode or PageData once it has been returned from here. The
+# block's PageData is memoized with it, as a hit never reaches the parser
+@functools.lru_cache(maxsize=BLOCK_CACHE_SIZE)
+def render_block(block_type, lines, basepath="/") -> tuple:
+    data = PageData()
+    node = block_to_html_node(block_type, list(lines), basepath, data)
+    return node, data
+
+
+def block_cache_stats() -> dict:
+    info = render_block.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
+
+
+def anchor_heading(block_type, node, data) -> HTMLNode:
+    # Memoized nodes are shared between pages, so the id goes on a copy
+    if block_type != BlockType.HEADING:
+        return node
+    return ParentNode(node.tag, node.children, {"id": data.headings[-1][2]})
+
+
+def toc_html(headings) -> str:
+    if not headings:
+        return ""
+    items = []
+    stack = [(headings[0][0], items)]
+    for level, text, anchor in headings:
+        while len(stack) > 1 and level < stack[-1][0]:
+            stack.pop()
+        if level < stack[0][0]:
+            # A heading above the first one's level joins the top list
+            stack[0] = (level, items)
+        parent_level, siblings = stack[-1]
+        if level > parent_level and siblings:
+            nested = []
+            siblings[-1].children.append(ParentNode("ul", nested))
+            stack.append((level, nested))
+            siblings = nested
+        link = LeafNode("a", text, {"href": f"#{anchor}"})
+        siblings.append(ParentNode("li", [link]))
+    return ParentNode("nav", [ParentNode("ul", items)]).to_html()
+
+
+def page_slots(template, page, content) -> dict:
+    slots = {"Title": page["title"], "Content": content}
+    # The TOC is only built for templates that place it
+    if "TOC" in template.slots:
+        with profiling.stage("toc"):
+            slots["TOC"] = toc_html(page["headings"])
+    return slots
+
+
+def source_blocks(markdown, data=None):
+    # The blocks of markdown text or mapped bytes after any front matter,
+    # whose metadata goes to data
+    end = front_matter_end(markdown)
+    if end and data is not None:
+        front_matter = markdown[:end]
+        if not isinstance(front_matter, str):
+            front_matter = front_matter.decode()
+        lines = front_matter.splitlines()[1:-1]
+        data.metadata = page_metadata(parse_front_matter(lines))
+    if isinstance(markdown, str):
+        return scan_blocks(markdown[end:])
+    return scan_mapped_blocks(markdown, end)
+
+
+def file_blocks(f, data=None):
+    # Like source_blocks for an open file, which is read READ_SIZE at a time
+    # once any front matter has been read line by line
+    head = [f.readline()]
+    if head[0] == "---\n":
+        while head[-1] != "":
+            head.append(f.readline())
+            if head[-1].rstrip() == "---":
+                if data is not None:
+                    data.metadata = page_metadata(parse_front_matter(head[1:-1]))
+                head = []
+                break
+    chunks = itertools.chain(head, iter(functools.partial(f.read, READ_SIZE), ""))
+    return iter_blocks(chunks)
+
+
+def markdown_to_html_node(markdown, basepath="/", data=None) -> HTMLNode:
+    if data is None:
+        data = PageData()
+    children = []
+    with profiling.stage("blocks"):
+        if profiling.active is not None:
+            before = render_block.cache_info()
+        for block_type, lines in source_blocks(markdown, data):
+            node, block_data = render_block(block_type, tuple(lines), basepath)
+            data.merge(block_data)
+            children.append(anchor_heading(block_type, node, data))
+        if profiling.active is not None:
+            after = render_block.cache_info()
+            profiling.count("block_hits", after.hits - before.hits)
+            profiling.count("block_misses", after.misses - before.misses)
     return ParentNode("div", children)
 
 
+# Renders one block at a time as it is written
+class MarkdownFile:
+    def __init__(self, path, basepath="/", search=False) -> None:
+        self.path = path
+        self.basepath = basepath
+        self.data = PageData(search)
+        self.done = False
+
+    def iter_html(self):
+        yield "<div>"
+        with open(self.path, "r") as f:
+            for block_type, lines in file_blocks(f, self.data):
+                # Not memoized: render_block would keep every block of the
+                # page alive, which is what streaming it avoids
+                data = PageData()
+                node = block_to_html_node(block_type, lines, self.basepath, data)
+                self.data.merge(data)
+                yield from anchor_heading(block_type, node, self.data).iter_html()
+        yield "</div>"
+        self.done = True
+
+    def write_html(self, fp) -> None:
+        fp.writelines(self.iter_html())
+
+    def scan_headings(self) -> list:
+        # Converts only the heading blocks
+        data = PageData()
+        with open(self.path, "r") as f:
+            for block_type, lines in file_blocks(f):
+                if block_type == BlockType.HEADING:
+                    block = PageData()
+                    block_to_html_node(block_type, lines, self.basepath, block)
+                    data.merge(block)
+        return data.headings
+
+
+# Only a TOC placed before the content scans ahead
+class TableOfContents:
+    def __init__(self, content) -> None:
+        self.content = content
+
+    def write_html(self, fp) -> None:
+        if self.content.done:
+            fp.write(toc_html(self.content.data.headings))
+        else:
+            fp.write(toc_html(self.content.scan_headings()))
+
+
 def copy_static(static_path, docs_path) -> None:
+    clean_directory(docs_path)
+    recursive_copy(static_path, docs_path)
+
+
+def clean_directory(docs_path) -> None:
+    import shutil
+
     if os.path.exists(docs_path):
         for item in os.listdir(docs_path):
             item_path = os.path.join(docs_path, item)
@@ -241,10 +568,11 @@ def copy_static(static_path, docs_path) -> None:
                 os.remove(item_path)
     else:
         os.mkdir(docs_path)
-    recursive_copy(static_path, docs_path)
 
 
 def recursive_copy(folder, destination) -> None:
+    import shutil
+
     if not os.path.exists(folder):
         print("Folder to copy doesn't exist")
         return
@@ -258,36 +586,195 @@ def recursive_copy(folder, destination) -> None:
             shutil.copy(item_path, os.path.join(destination, item))
 
 
-def extract_title(markdown) -> str:
-    for line in markdown.split("\n"):
-        if line.startswith("# "):
-            return line.replace("#", "").lstrip()
-    raise Exception("Title not found")
+def file_hash(path) -> str:
+    import hashlib
 
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+
+def remove_output(dest_dir_path, relative_dest) -> None:
+    path = os.path.join(dest_dir_path, relative_dest)
+    if os.path.exists(path):
+        os.remove(path)
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory) != os.path.abspath(dest_dir_path):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+@contextlib.contextmanager
+def open_source(from_path, use_mmap=False):
+    if use_mmap:
+        import mmap
+
+        with open(from_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    # Text mode translates "\r\n" line endings, which the
+                    # byte-level block scanner does not
+                    if buffer.find(b"\r") == -1:
+                        yield buffer
+                        return
     with open(from_path, "r") as f:
-        markdown = f.read()
-    with open(template_path, "r") as f:
-        template = f.read()
-    title = extract_title(markdown)
-    content = markdown_to_html_node(markdown).to_html()
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", content)
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
-    with open(dest_path, "w") as f:
-        f.write(template)
-
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+        yield f.read()
+
+
+def read_title(from_path) -> str:
+    # Scans blocks only up to the first "# " heading
+    data = PageData()
+    with open(from_path, "r") as f:
+        blocks = file_blocks(f, data)
+        if "title" in data.metadata:
+            return data.title()
+        for block_type, lines in blocks:
+            if block_type == BlockType.HEADING and lines[0].startswith("# "):
+                return lines[0].replace("#", "").lstrip()
+    return data.title()
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    cache_dir=None,
+    use_mmap=False,
+    writer=None,
+    search=False,
+):
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    return render_page(
+        from_path,
+        template_path,
+        dest_path,
+        basepath,
+        cache_dir,
+        use_mmap,
+        writer,
+        search,
+    )
+
+
+def render_cached(markdown, basepath, cache_dir, search=False) -> tuple:
+    from cache import RenderCache
+
+    cache = RenderCache(cache_dir)
+    with profiling.stage("cache"):
+        key = cache.key(markdown, basepath, search)
+        entry = cache.get(key)
+    if entry is not None:
+        return entry
+    data = PageData(search)
+    content = markdown_to_html_node(markdown, basepath, data)
+    with profiling.stage("serialize"):
+        content = content.to_html()
+    with profiling.stage("title"):
+        page = data.record()
+    with profiling.stage("cache"):
+        cache.put(key, content, page)
+    return content, page
+
+
+def render_document(
+    markdown, template_path, basepath, cache_dir=None, search=False
+) -> tuple:
+    if cache_dir is not None:
+        content, page = render_cached(markdown, basepath, cache_dir, search)
+    else:
+        data = PageData(search)
+        content = markdown_to_html_node(markdown, basepath, data)
+        with profiling.stage("serialize"):
+            content = content.to_html()
+        with profiling.stage("title"):
+            page = data.record()
+    with profiling.stage("load_template"):
+        template = load_template(template_path, basepath)
+    slots = page_slots(template, page, content)
+    with profiling.stage("template"):
+        return template.render(**slots), page
+
+
+def parse_source(
+    from_path, basepath, cache_dir=None, use_mmap=False, search=False
+) -> tuple:
+    with contextlib.ExitStack() as stack:
+        with profiling.stage("read"):
+            markdown = stack.enter_context(open_source(from_path, use_mmap))
+        if cache_dir is not None:
+            return render_cached(markdown, basepath, cache_dir, search)
+        data = PageData(search)
+        content = markdown_to_html_node(markdown, basepath, data)
+        with profiling.stage("title"):
+            return content, data.record()
+
+
+def render_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    cache_dir=None,
+    use_mmap=False,
+    writer=None,
+    search=False,
+) -> dict:
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        return stream_page(from_path, template_path, dest_path, basepath, search)
+    with profiling.page(from_path):
+        content, page = parse_source(from_path, basepath, cache_dir, use_mmap, search)
+        with profiling.stage("load_template"):
+            template = load_template(template_path, basepath)
+        slots = page_slots(template, page, content)
+        if writer is not None:
+            writer.write(dest_path, template, slots, from_path)
+            return page
+        with profiling.stage("write"):
+            with atomic_output(dest_path) as f:
+                template.write(f, **slots)
+    return page
+
+
+def stream_page(from_path, template_path, dest_path, basepath, search=False) -> dict:
+    with profiling.page(from_path):
+        with profiling.stage("title"):
+            title = read_title(from_path)
+        with profiling.stage("load_template"):
+            template = load_template(template_path, basepath)
+        content = MarkdownFile(from_path, basepath, search)
+        slots = {"Title": title, "Content": content}
+        if "TOC" in template.slots:
+            slots["TOC"] = TableOfContents(content)
+        with profiling.stage("write"):
+            with atomic_output(dest_path) as f:
+                template.write(f, **slots)
+    return content.data.record()
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    cache_dir=None,
+    use_mmap=False,
+):
     for item in os.listdir(dir_path_content):
         item_path = os.path.join(dir_path_content, item)
         if os.path.isdir(item_path):
-            os.mkdir(os.path.join(dest_dir_path, item))
+            os.makedirs(os.path.join(dest_dir_path, item), exist_ok=True)
             generate_pages_recursive(
-                item_path, template_path, os.path.join(dest_dir_path, item), basepath
+                item_path,
+                template_path,
+                os.path.join(dest_dir_path, item),
+                basepath,
+                cache_dir,
+                use_mmap,
             )
         else:
             generate_page(
@@ -295,4 +782,6 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, bas
                 template_path,
                 os.path.join(dest_dir_path, item.replace(".md", ".html")),
                 basepath,
+                cache_dir,
+                use_mmap,
             )
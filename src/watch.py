@@ -0,0 +1,421 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from assets import copy_file, is_unchanged, walk_files
+from build import (
+    PAGE_FIELDS,
+    discover_pages,
+    generate_site_incremental,
+    load_manifest,
+    manifest_pages,
+    render_pages,
+    save_manifest,
+    source_entry,
+)
+from listings import generate_listings
+from references import referring_pages
+from search import SEARCH_DIR, build_search_index
+from utils import file_hash, remove_output
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x800
+IN_CLOEXEC = 0x80000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_within(path, root) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class PollingWatcher:
+    def __init__(self, roots, interval=0.5) -> None:
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict:
+        snapshot = {}
+        for root in self.roots:
+            if os.path.isfile(root):
+                stat = os.stat(root)
+                snapshot[root] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for directory, _, files in os.walk(root):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout=None) -> set:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {
+                path
+                for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, roots, debounce=0.05) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.add_watch_call = libc.inotify_add_watch
+        self.add_watch_call.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.debounce = debounce
+        self.directories = {}
+        for root in self.roots:
+            if os.path.isdir(root):
+                self.watch_tree(root)
+            else:
+                self.add_watch(os.path.dirname(root))
+
+    def add_watch(self, directory) -> None:
+        wd = self.add_watch_call(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self.directories[wd] = directory
+
+    def watch_tree(self, root) -> list:
+        files = []
+        for directory, _, names in os.walk(root):
+            self.add_watch(directory)
+            files.extend(os.path.join(directory, name) for name in names)
+        return files
+
+    def read_events(self) -> set:
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self.roots)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self.directories[wd]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                changed.add(path)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land in a new directory before it is watched
+                    changed.update(self.watch_tree(path))
+
+    def poll(self, timeout=None) -> set:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        changed = set()
+        while True:
+            changed |= self.read_events()
+            if not select.select([self.fd], [], [], self.debounce)[0]:
+                break
+        return {
+            path
+            for path in changed
+            if any(is_within(path, root) for root in self.roots)
+        }
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def create_watcher(roots, poll=False, interval=0.5):
+    if not poll:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(roots, interval)
+
+
+class SiteWatcher:
+    def __init__(
+        self,
+        static_path,
+        dir_path_content,
+        template_path,
+        dest_dir_path,
+        basepath,
+        jobs=1,
+        asset_method="copy",
+        cache_dir=None,
+        use_mmap=False,
+        site_url=None,
+        search=False,
+    ) -> None:
+        self.static_path = os.path.abspath(static_path)
+        self.content_path = os.path.abspath(dir_path_content)
+        self.template_path = os.path.abspath(template_path)
+        self.dest_path = os.path.abspath(dest_dir_path)
+        self.basepath = basepath
+        self.jobs = jobs
+        self.asset_method = asset_method
+        self.cache_dir = cache_dir
+        self.use_mmap = use_mmap
+        self.site_url = site_url
+        self.search = search
+        self.manifest = {}
+
+    def build(self) -> list:
+        generated = generate_site_incremental(
+            self.static_path,
+            self.content_path,
+            self.template_path,
+            self.dest_path,
+            self.basepath,
+            self.jobs,
+            self.asset_method,
+            cache_dir=self.cache_dir,
+            use_mmap=self.use_mmap,
+            search=self.search,
+            site_url=self.site_url,
+        )
+        self.manifest = load_manifest(self.dest_path)
+        if self.search:
+            pages, _ = manifest_pages(self.manifest)
+            self.write_index(pages)
+        return generated
+
+    def write_index(self, pages) -> list:
+        if build_search_index(pages, self.basepath).write(self.dest_path) == 0:
+            return []
+        return [os.path.join(self.dest_path, SEARCH_DIR)]
+
+    def page_dest(self, relative_source) -> str:
+        directory, name = os.path.split(relative_source)
+        return os.path.join(directory, name.replace(".md", ".html"))
+
+    def affected_pages(self, changed) -> tuple:
+        pages = self.manifest["pages"]
+        sources = set()
+        removed = set()
+        for path in changed:
+            if not is_within(path, self.content_path):
+                continue
+            relative = os.path.relpath(path, self.content_path)
+            if os.path.isfile(path):
+                sources.add(relative)
+                continue
+            prefix = "" if relative == "." else relative
+            removed.update(
+                source
+                for source in pages
+                if (prefix == "" or is_within(source, prefix))
+                and not os.path.isfile(os.path.join(self.content_path, source))
+            )
+            if os.path.isdir(path):
+                for source, _ in discover_pages(path, path):
+                    sources.add(os.path.relpath(source, self.content_path))
+        template_hash = None
+        if self.template_path in changed:
+            template_hash = file_hash(self.template_path)
+            if template_hash == self.manifest["template"]:
+                template_hash = None
+            else:
+                sources.update(set(pages) - removed)
+        return sources, removed, template_hash
+
+    def render(self, stale) -> tuple:
+        try:
+            rendered = render_pages(
+                stale,
+                self.template_path,
+                self.basepath,
+                self.jobs,
+                self.cache_dir,
+                self.use_mmap,
+                self.search,
+            )
+            return rendered, set()
+        except Exception:
+            rendered = {}
+            failed = set()
+            for source, dest in stale:
+                try:
+                    page = render_pages(
+                        [(source, dest)],
+                        self.template_path,
+                        self.basepath,
+                        cache_dir=self.cache_dir,
+                        use_mmap=self.use_mmap,
+                        search=self.search,
+                    )
+                    rendered.update(page)
+                except Exception as error:
+                    print(f"Failed to render {source}: {error!r}")
+                    failed.add(source)
+            return rendered, failed
+
+    def update_pages(self, changed, moved=()) -> list:
+        pages = self.manifest["pages"]
+        sources, removed, template_hash = self.affected_pages(changed)
+        rebuild_all = template_hash is not None
+        moved = set(moved)
+        moved.update(pages[relative]["dest"] for relative in removed)
+        moved.update(
+            self.page_dest(relative) for relative in sources if relative not in pages
+        )
+        referrers = referring_pages(pages, moved) - removed
+        entries = {}
+        stale = []
+        for relative in sorted(sources | referrers):
+            source = os.path.join(self.content_path, relative)
+            previous = pages.get(relative)
+            entry = source_entry(source, previous)
+            entry["dest"] = self.page_dest(relative)
+            if (
+                rebuild_all
+                or previous is None
+                or previous["hash"] != entry["hash"]
+                or relative in referrers
+            ):
+                stale.append((source, os.path.join(self.dest_path, entry["dest"])))
+            else:
+                entry.update(
+                    (field, previous[field])
+                    for field in PAGE_FIELDS
+                    if field in previous
+                )
+            entries[relative] = entry
+        rendered, failed = self.render(stale)
+        for relative, entry in entries.items():
+            source = os.path.join(self.content_path, relative)
+            if source in failed:
+                continue
+            if source in rendered:
+                entry.update(rendered[source])
+            pages[relative] = entry
+        updated = [dest for source, dest in stale if source not in failed]
+        # Until every page has been rendered with it, a new template must not
+        # be recorded, or the pages left behind would never be rendered again
+        if rebuild_all and not failed:
+            self.manifest["template"] = template_hash
+        for relative in sorted(removed):
+            dest = pages.pop(relative)["dest"]
+            remove_output(self.dest_path, dest)
+            updated.append(os.path.join(self.dest_path, dest))
+        return updated
+
+    def update_assets(self, changed) -> list:
+        assets = self.manifest.setdefault("assets", {})
+        pages = {entry["dest"] for entry in self.manifest["pages"].values()}
+        copied = []
+        for path in sorted(changed):
+            if not is_within(path, self.static_path):
+                continue
+            relative = os.path.relpath(path, self.static_path)
+            if os.path.isdir(path):
+                files = [os.path.join(relative, name) for name in walk_files(path)]
+            elif os.path.isfile(path):
+                files = [relative]
+            else:
+                prefix = "" if relative == "." else relative
+                for known in list(assets):
+                    if prefix != "" and not is_within(known, prefix):
+                        continue
+                    if not os.path.exists(os.path.join(self.static_path, known)):
+                        remove_output(self.dest_path, known)
+                        del assets[known]
+                        copied.append(os.path.join(self.dest_path, known))
+                continue
+            for item in files:
+                if item in pages:
+                    continue
+                source = os.path.join(self.static_path, item)
+                dest = os.path.join(self.dest_path, item)
+                if not is_unchanged(source, dest):
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    copy_file(source, dest, self.asset_method)
+                    copied.append(dest)
+                stat = os.stat(source)
+                assets[item] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        return copied
+
+    def handle(self, changed) -> list:
+        changed = {os.path.abspath(path) for path in changed}
+        assets = set(self.manifest.get("assets", {}))
+        updated = self.update_assets(changed)
+        moved = assets.symmetric_difference(self.manifest["assets"])
+        updated += self.update_pages(changed, moved)
+        pages, _ = manifest_pages(self.manifest)
+        self.manifest["listings"], written = generate_listings(
+            pages,
+            self.template_path,
+            self.dest_path,
+            self.basepath,
+            self.manifest.get("listings"),
+            self.site_url,
+        )
+        updated += written
+        if self.search:
+            updated += self.write_index(pages)
+        save_manifest(self.dest_path, self.manifest)
+        return updated
+
+    def run(self, watcher) -> None:
+        try:
+            while True:
+                changed = watcher.poll()
+                if not changed:
+                    continue
+                start = time.perf_counter()
+                try:
+                    updated = self.handle(changed)
+                except Exception as error:
+                    print(f"Build failed: {error!r}")
+                    continue
+                elapsed = (time.perf_counter() - start) * 1e3
+                print(f"Updated {len(updated)} outputs in {elapsed:.1f}ms")
+        finally:
+            watcher.close()